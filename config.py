@@ -1,6 +1,7 @@
 """
 Configuration defaults for RAG question generation.
 """
+import sys
 from dataclasses import dataclass
 from typing import Dict, Optional
 
@@ -15,9 +16,18 @@ TEMPERATURE = 0.3
 DEFAULT_OLLAMA_MODEL = "qwen2.5:7b"
 DEFAULT_OLLAMA_URL = "http://localhost:11434"
 OLLAMA_TIMEOUT = 60
+# Context evaluate.py requests from Ollama: room for the evaluator system prompt
+# plus a long chunk, since the default context silently truncates the prompt and
+# defeats its prefix KV cache. Other callers keep the model's own default
+OLLAMA_NUM_CTX = 8192
+# Keep the model (and its cached prompt prefix) loaded between requests
+OLLAMA_KEEP_ALIVE = "30m"
 
+# dataclass(slots=True) needs Python 3.10+; older interpreters keep __dict__
+DATACLASS_SLOTS: Dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class ProviderConfig:
     """Model configuration for a provider."""
 
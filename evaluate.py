@@ -5,24 +5,82 @@ Scores question-answer pairs using semantic evaluation (1-10 scale)
 import argparse
 import json
 import os
+import random
+import re
+import threading
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
+import json_utils
 from config import (
+    DATACLASS_SLOTS,
     DEFAULT_PROVIDER,
+    OLLAMA_NUM_CTX,
     OLLAMA_TIMEOUT,
     PROVIDER_CONFIGS,
     PROVIDER_KIND_MAP,
 )
 from providers.base import LLMProvider
+from providers.cache import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_MIN_SIMILARITY,
+    ResponseCache,
+    SemanticCache,
+    make_cache_key,
+)
 from providers.factory import create_provider, normalize_provider_name
 
 # Constants
 DEFAULT_TEMPERATURE = 0.0
-DEFAULT_SLEEP = 0.3
+DEFAULT_SLEEP = 0.0
+DEFAULT_CONCURRENCY = 8
+DEFAULT_BATCH_SIZE = 1
+MAX_INPUT_TOKENS = 30000
+MAX_OUTPUT_TOKENS = 2000
+MAX_BATCH_OUTPUT_TOKENS = 8000
+CHARS_PER_TOKEN = 3  # conservative for Vietnamese text
 ENV_FILE = ".env"
+RESULT_FIELDS = ("evaluate", "score", "check")
+SCORED_LABELS = {"correct", "unclear", "incorrect"}
+JSON_DECODER = json.JSONDecoder()
+T = TypeVar("T")
+MAX_ATTEMPTS = 3
+# A failed batch is retried whole before falling back to one request per item
+BATCH_ATTEMPTS = 2
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+# Provider errors that fail every request the same way; retrying only burns time.
+# Any 4xx (bad key, unknown model, context too long, ...) except 408 timeouts
+# and 429 rate limits, as worded by requests ("404 Client Error") and the
+# OpenAI/Anthropic SDKs ("Error code: 400"), plus a missing SDK
+FATAL_PROVIDER_ERROR_PATTERN = re.compile(
+    r"\b4(?!08|29)\d\d Client Error|Error code: 4(?!08|29)\d\d\b"
+    r"|invalid[ _]api[ _]key|missing_\w+_library",
+    re.IGNORECASE,
+)
+# Asks providers for a bare JSON reply; extract_json_object still tolerates prose
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+# KEY=value, KEY="value" or KEY='value'; comment and blank lines never match
+ENV_LINE_PATTERN = re.compile(
+    r"^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*"
+    r"""(?:"([^"\n]*)"|'([^'\n]*)'|([^\n]*?))[ \t\r]*$""",
+    re.MULTILINE,
+)
 
 SYSTEM_PROMPT = """
 You are a semantic evaluator with contextual understanding.
@@ -201,7 +259,93 @@ Output JSON only in the following format:
 """
 
 
-@dataclass(frozen=True)
+SYSTEM_PROMPT_V2 = """
+You are a semantic evaluator. Given a Question, a Chunk (ground truth retrieved for that Question) and an Answer, decide whether the Answer is semantically supported by the Chunk, WITH consideration of the Question context.
+
+Ngữ cảnh từ Question:
+- Chunk được truy xuất VÌ nó thỏa entity/điều kiện trong Question → Chunk NGẦM ĐỊNH thuộc context đó.
+- Answer kết hợp entity/điều kiện từ Question + dữ liệu từ Chunk là ĐÚNG.
+
+Thang điểm (chọn đúng một):
+| Score | Mức | Tiêu chí |
+|---|---|---|
+| 10 | PERFECT | Chính xác, đầy đủ, diễn đạt tốt |
+| 9 | EXCELLENT | Đúng 100%, diễn đạt có thể tốt hơn |
+| 8 | GOOD | Cốt lõi đúng 100%, có suy luận/bổ sung được phép, thiếu chi tiết nhỏ |
+| 7 | ACCEPTABLE | Đúng ý chính, thiếu hoặc thêm chút không đáng kể |
+| 6 | PARTIALLY_SUPPORTED | Ý chính đúng nhưng thêm fact cụ thể mới, không phổ biến, có thể sai |
+| 5 | UNCLEAR | Chunk mơ hồ hoặc không liên quan, không kết luận được |
+| 4 | MOSTLY_UNSUPPORTED | Phần lớn nội dung không có trong chunk |
+| 3 | MINOR_ERROR | Sai chi tiết phụ, hoặc nói "không có thông tin" khi chunk có thông tin/link |
+| 2 | MAJOR_ERROR | Sai cốt lõi (số liệu, thời gian, địa điểm) hoặc kết luận ngược chunk |
+| 1 | COMPLETELY_WRONG | Bịa đặt hoặc mâu thuẫn hoàn toàn với chunk |
+
+Quy tắc:
+1. Thông tin cốt lõi (số liệu, thời gian, tên riêng, địa điểm) phải khớp chunk 100%.
+2. Chấp nhận paraphrase và suy luận hợp lý (VD: "rà soát" → "rà soát và điều chỉnh", "phê duyệt" ~ "ký duyệt").
+3. Không dùng kiến thức ngoài chunk. Không thưởng điểm cho câu trả lời dài dòng.
+4. Chunk có link/reference: hướng dẫn user đến link là đúng; nói "không có thông tin" → 2-3.
+5. Thời điểm/điều kiện cụ thể không có trong chunk (VD: "sau khi giao", "trong 48 giờ", "sau ngày 20 hàng tháng") → tối đa 6.
+
+Bổ sung được phép (ưu tiên cao nhất, override quy tắc trên; quy chế nội bộ CÔNG TY URBOX). Nếu cốt lõi đúng 100% và không mâu thuẫn → 7-8:
+A. Mốc bắt đầu thời hạn: kể từ ngày nhận thông báo/quyết định/lương/bảng lương, phát sinh sự việc/vi phạm, kết thúc tháng/quý/năm
+B. Trình tự chung chung ngầm định: sau khi hoàn tất, sau xác nhận từ client, sau bước kiểm tra, sau phê duyệt, khi nhận được thông tin
+C. Mục đích/lợi ích ngầm định: tăng tính minh bạch, an toàn tài chính, giảm rủi ro pháp lý/cá nhân, tránh tranh chấp, thuận tiện đối soát, quản lý dòng tiền công ty
+D. Paraphrase cấu trúc: "Bước 1" cho danh sách có thứ tự; liệt kê lại tiêu chí/điều kiện từ Question
+
+Ví dụ:
+1. HỢP LỆ - Q: "Chiết khấu của Vietlott cho Cash voucher?" | Chunk: "CHIẾT KHẤU: 3% tổng doanh thu THÁNG" | A: "Chiết khấu của Vietlott cho Cash voucher là 3% tổng doanh thu tháng" → 9-10: nhắc lại entity từ Question, giá trị đúng với Chunk
+2. KHÔNG HỢP LỆ - Q: "Ai thông báo OP kích hoạt đơn hàng?" | Chunk: "KAM/BD thông báo OP kích hoạt đơn hàng" | A: "KAM/BD thông báo OP kích hoạt đơn hàng sau khi giao" → 6: "sau khi giao" là thời điểm cụ thể không có trong Chunk
+
+Output JSON only in the following format:
+{
+  "label": "ENTAILED | NOT_SUPPORTED | CONTRADICTED",
+  "score": number from 1 to 10,
+  "confidence": number between 0 and 1,
+  "reason": "short explanation in Vietnamese"
+}
+"""
+
+# v2 compresses v1's rubric into a table and two examples; keep v1 as the
+# default until v2's verdicts have been checked against a golden set
+SYSTEM_PROMPTS = {"v1": SYSTEM_PROMPT, "v2": SYSTEM_PROMPT_V2}
+DEFAULT_PROMPT_VERSION = "v1"
+
+
+BATCH_INSTRUCTIONS = """
+Evaluate EACH item below independently, using the same rules and scale.
+Output JSON only in the following format, with exactly one entry per item:
+{
+  "results": [
+    {
+      "item": item number,
+      "label": "ENTAILED | NOT_SUPPORTED | CONTRADICTED",
+      "score": number from 1 to 10,
+      "confidence": number between 0 and 1,
+      "reason": "short explanation in Vietnamese"
+    }
+  ]
+}
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-bound estimate of the token count of text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+SYSTEM_PROMPT_TOKENS = {
+    version: estimate_tokens(prompt) for version, prompt in SYSTEM_PROMPTS.items()
+}
+
+# Built once and shared by every request; providers only read messages
+SYSTEM_MESSAGES: Dict[str, Dict[str, str]] = {
+    version: {"role": "system", "content": prompt}
+    for version, prompt in SYSTEM_PROMPTS.items()
+}
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class EvaluatorConfig:
     """Runtime configuration for the evaluator."""
 
@@ -210,10 +354,76 @@ class EvaluatorConfig:
     provider: str
     temperature: float
     sleep_time: float
+    concurrency: int
     ollama_model: str
     ollama_url: str
     base_url: Optional[str] = None
     model: Optional[str] = None
+    use_cache: bool = True
+    semantic_cache: bool = False
+    cache_threshold: float = DEFAULT_MIN_SIMILARITY
+    batch_size: int = DEFAULT_BATCH_SIZE
+    force: bool = False
+    prompt_version: str = DEFAULT_PROMPT_VERSION
+    rpm: Optional[int] = None
+    tpm: Optional[int] = None
+
+
+class TokenBucket:
+    """Per-minute quota that refills continuously and bursts up to one minute's worth.
+
+    Callers reserve capacity up front; the level may go negative, which makes
+    later callers wait their turn instead of racing for the refill. Not
+    thread-safe on its own: RequestPacer serializes access.
+    """
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._level = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take amount from the bucket and return how long to wait before using it."""
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+        self._level -= min(amount, self.capacity)
+        return max(0.0, -self._level / self.rate)
+
+
+class RequestPacer:
+    """Thread-safe limiter for request starts.
+
+    Enforces a fixed minimum interval between starts and, optionally,
+    requests-per-minute and tokens-per-minute quotas.
+    """
+
+    def __init__(
+        self, interval: float, rpm: Optional[int] = None, tpm: Optional[int] = None
+    ) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+
+    def wait(self, tokens: int = 0) -> None:
+        """Block until the caller may start a request of about tokens prompt tokens."""
+        if self.interval <= 0 and self._requests is None and self._tokens is None:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+            delay = start - now
+            if self._requests:
+                delay = max(delay, self._requests.reserve(1, now))
+            if self._tokens:
+                delay = max(delay, self._tokens.reserve(tokens, now))
+
+        if delay > 0:
+            time.sleep(delay)
 
 
 def build_user_prompt(item: Dict) -> str:
@@ -230,42 +440,229 @@ Answer:
 """.strip()
 
 
-def build_messages(provider_name: str, prompt: str) -> List[Dict[str, str]]:
-    """Build message array based on provider type."""
-    if provider_name == "anthropic":
-        return [{"role": "user", "content": prompt}]
+def build_batch_user_prompt(items: List[Dict]) -> str:
+    """Build one prompt asking for a verdict on each of several QA items."""
+    parts = [BATCH_INSTRUCTIONS.strip()]
+    for number, item in enumerate(items, start=1):
+        parts.append(f"Item {number}:\n{build_user_prompt(item)}")
+    return "\n\n".join(parts)
 
-    return [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": prompt},
-    ]
 
+def build_messages(
+    prompt: str, prompt_version: str = DEFAULT_PROMPT_VERSION
+) -> List[Dict[str, str]]:
+    """Build message array with the shared system prompt as a cacheable prefix."""
+    return [SYSTEM_MESSAGES[prompt_version], {"role": "user", "content": prompt}]
 
-def call_llm(provider: LLMProvider, provider_name: str, item: Dict, temperature: float) -> Dict:
-    """Call LLM for semantic evaluation."""
-    prompt = build_user_prompt(item)
-    messages = build_messages(provider_name, prompt)
 
+def extract_json_object(text: str) -> Optional[Dict]:
+    """Decode the first JSON object embedded in text, ignoring surrounding prose."""
+    # Fast path: JSON-only replies decode in one call with orjson when available
+    stripped = text.strip()
+    if stripped.startswith("{") and stripped.endswith("}"):
+        try:
+            value = json_utils.loads(stripped)
+        except json_utils.JSONDecodeError:
+            value = None
+        if isinstance(value, dict):
+            return value
+
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, _ = JSON_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            value = None
+        if isinstance(value, dict):
+            return value
+        start = text.find("{", start + 1)
+
+    return None
+
+
+class RetryableError(ValueError):
+    """A failed LLM call that a fresh request may not repeat."""
+
+
+class PromptTooLongError(ValueError):
+    """A prompt over MAX_INPUT_TOKENS, rejected before it is sent."""
+
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given zero-based attempt."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+
+
+def request_completion(
+    provider: LLMProvider,
+    provider_name: str,
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    parse: Callable[[Dict], T],
+    cache: Optional[ResponseCache] = None,
+    semantic_cache: Optional[SemanticCache] = None,
+    prompt_version: str = DEFAULT_PROMPT_VERSION,
+    pacer: Optional[RequestPacer] = None,
+) -> T:
+    """Return parse() of the JSON object the LLM replies with, consulting the caches first.
+
+    Only replies that decode and pass parse() are cached, so a retry after a
+    bad reply always reaches the provider; cached replies parse() rejects are
+    ignored.
+    """
+    # Reject prompts the model would truncate or refuse before paying for the round-trip
+    tokens = SYSTEM_PROMPT_TOKENS[prompt_version] + estimate_tokens(prompt)
+    if tokens > MAX_INPUT_TOKENS:
+        raise PromptTooLongError(
+            f"Prompt too long: ~{tokens} tokens (limit {MAX_INPUT_TOKENS})"
+        )
+
+    cache_key = make_cache_key(
+        provider_name,
+        getattr(provider, "model", ""),
+        temperature,
+        SYSTEM_PROMPTS[prompt_version],
+        prompt,
+    )
+    cached = cache.get(cache_key) if cache else None
+
+    vector = None
+    if cached is None and semantic_cache:
+        vector = semantic_cache.embed(prompt)
+        cached = semantic_cache.get(prompt, vector)
+
+    parsed = extract_json_object(cached) if cached else None
+    if parsed is not None:
+        try:
+            return parse(parsed)
+        except ValueError:
+            pass
+
+    # Cache hits above cost no quota; only real requests are paced
+    if pacer:
+        pacer.wait(tokens)
+    messages = build_messages(prompt, prompt_version)
     response_text = provider.chat(
         messages,
         temperature=temperature,
-        max_tokens=2000,
+        max_tokens=max_tokens,
+        response_format=JSON_RESPONSE_FORMAT,
     )
-
     if not response_text:
-        raise ValueError("Empty response from LLM")
-
-    # Parse JSON response
+        error = provider.last_error
+        if error and FATAL_PROVIDER_ERROR_PATTERN.search(error):
+            raise ValueError(f"LLM request rejected: {error}")
+        raise RetryableError(f"Empty response from LLM: {error}" if error else "Empty response from LLM")
+
+    # Validate before caching so a bad reply is never replayed
+    result = parse(parse_json_response(response_text))
+    if cache:
+        cache.set(cache_key, response_text)
+    if semantic_cache:
+        if vector is None:
+            vector = semantic_cache.embed(prompt)
+        semantic_cache.add(prompt, vector, response_text)
+    return result
+
+
+def parse_json_response(response_text: str) -> Dict:
+    """Parse the JSON object in an LLM response."""
+    parsed = extract_json_object(response_text)
+    if parsed is None:
+        raise RetryableError(f"Invalid JSON response: {response_text[:200]!r}")
+    return parsed
+
+
+class NliResult(NamedTuple):
+    """One verdict parsed from the model's JSON reply."""
+
+    label: str
+    score: int
+    confidence: float
+    reason: str
+
+
+def parse_nli_result(raw: object) -> NliResult:
+    """Validate a decoded verdict object and convert it to an NliResult."""
+    if not isinstance(raw, dict):
+        raise ValueError(f"Invalid verdict: expected object, got {type(raw).__name__}")
     try:
-        # Try to extract JSON from response
-        import re
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(0))
-        else:
-            return json.loads(response_text)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON response: {e}")
+        return NliResult(
+            label=str(raw.get("label", "UNKNOWN")),
+            score=int(raw.get("score", 0)),
+            confidence=float(raw.get("confidence", 0.0)),
+            reason=str(raw.get("reason", "")),
+        )
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid verdict: {e}")
+
+
+def call_llm(
+    provider: LLMProvider,
+    provider_name: str,
+    item: Dict,
+    temperature: float,
+    cache: Optional[ResponseCache] = None,
+    semantic_cache: Optional[SemanticCache] = None,
+    prompt_version: str = DEFAULT_PROMPT_VERSION,
+    pacer: Optional[RequestPacer] = None,
+) -> NliResult:
+    """Call LLM for semantic evaluation."""
+    return request_completion(
+        provider,
+        provider_name,
+        build_user_prompt(item),
+        temperature,
+        MAX_OUTPUT_TOKENS,
+        parse_nli_result,
+        cache,
+        semantic_cache,
+        prompt_version,
+        pacer,
+    )
+
+
+def call_llm_batch(
+    provider: LLMProvider,
+    provider_name: str,
+    items: List[Dict],
+    temperature: float,
+    cache: Optional[ResponseCache] = None,
+    prompt_version: str = DEFAULT_PROMPT_VERSION,
+    pacer: Optional[RequestPacer] = None,
+) -> List[Optional[Dict]]:
+    """Evaluate several items in one LLM call.
+
+    Returns one result per item, in order; None where the model skipped an item.
+    """
+    return request_completion(
+        provider,
+        provider_name,
+        build_batch_user_prompt(items),
+        temperature,
+        min(MAX_OUTPUT_TOKENS * len(items), MAX_BATCH_OUTPUT_TOKENS),
+        lambda response: parse_batch_results(response, len(items)),
+        cache,
+        prompt_version=prompt_version,
+        pacer=pacer,
+    )
+
+
+def parse_batch_results(response: Dict, count: int) -> List[Optional[Dict]]:
+    """Order a batch reply's results by item number; None where an item is missing."""
+    results = response.get("results")
+    if not isinstance(results, list):
+        # Typically one bare verdict; the batch is retried, then split per item
+        raise RetryableError("Invalid batch response: missing 'results' list")
+
+    by_item: Dict[int, Dict] = {}
+    for result in results:
+        try:
+            by_item[int(result["item"])] = result
+        except (KeyError, TypeError, ValueError):
+            continue
+    return [by_item.get(number) for number in range(1, count + 1)]
 
 
 def map_score_to_evaluate(score: int) -> str:
@@ -278,31 +675,206 @@ def map_score_to_evaluate(score: int) -> str:
         return "incorrect"
 
 
+def apply_result(item: Dict, nli: NliResult, idx: int) -> str:
+    """Store an LLM verdict on the item and return its progress line."""
+    item["evaluate"] = map_score_to_evaluate(nli.score)
+    item["score"] = nli.score
+    item["check"] = nli.reason
+    return f"[{idx}] {nli.label} (score: {nli.score}, confidence: {nli.confidence:.2f})"
+
+
+def apply_error(item: Dict, error: Exception, idx: int) -> str:
+    """Mark the item as failed and return its progress line."""
+    item["evaluate"] = "error"
+    item["score"] = 0
+    item["check"] = str(error)
+    return f"[{idx}] ERROR → {error}"
+
+
 def process_item(
     provider: LLMProvider,
     provider_name: str,
     config: EvaluatorConfig,
     item: Dict,
     idx: int,
-) -> None:
-    """Process a single QA item."""
-    try:
-        nli = call_llm(provider, provider_name, item, config.temperature)
+    pacer: RequestPacer,
+    cache: Optional[ResponseCache] = None,
+    semantic_cache: Optional[SemanticCache] = None,
+) -> str:
+    """Process a single QA item and return its progress line.
+
+    Empty or undecodable replies are retried with backoff; anything else
+    (prompt too long, rejected credentials, bad verdict) fails immediately.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        if attempt:
+            time.sleep(retry_delay(attempt - 1))
+        try:
+            nli = call_llm(
+                provider,
+                provider_name,
+                item,
+                config.temperature,
+                cache,
+                semantic_cache,
+                config.prompt_version,
+                pacer,
+            )
+        except RetryableError as e:
+            error = e
+        except Exception as e:
+            return apply_error(item, e, idx)
+        else:
+            line = apply_result(item, nli, idx)
+            return line + f" (retried {attempt}x)" if attempt else line
 
-        score = nli.get("score", 0)
-        item["evaluate"] = map_score_to_evaluate(score)
-        item["score"] = score
-        item["check"] = nli.get("reason", "")
+    return apply_error(item, error, idx) + f" (after {MAX_ATTEMPTS} attempts)"
 
-        label = nli.get("label", "UNKNOWN")
-        confidence = nli.get("confidence", 0)
-        print(f"[{idx}] {label} (score: {score}, confidence: {confidence:.2f})")
 
-    except Exception as e:
-        item["evaluate"] = "error"
-        item["score"] = 0
-        item["check"] = str(e)
-        print(f"[{idx}] ERROR → {e}")
+def process_batch(
+    provider: LLMProvider,
+    provider_name: str,
+    config: EvaluatorConfig,
+    batch: List[Tuple[int, Dict]],
+    pacer: RequestPacer,
+    cache: Optional[ResponseCache] = None,
+    semantic_cache: Optional[SemanticCache] = None,
+) -> List[str]:
+    """Process (idx, item) pairs in one LLM call and return their progress lines."""
+    if len(batch) == 1:
+        idx, item = batch[0]
+        return [
+            process_item(
+                provider, provider_name, config, item, idx, pacer, cache, semantic_cache
+            )
+        ]
+
+    items = [item for _, item in batch]
+    results = None
+    for attempt in range(BATCH_ATTEMPTS):
+        if attempt:
+            time.sleep(retry_delay(attempt - 1))
+        try:
+            results = call_llm_batch(
+                provider,
+                provider_name,
+                items,
+                config.temperature,
+                cache,
+                config.prompt_version,
+                pacer,
+            )
+        except RetryableError:
+            continue
+        except PromptTooLongError:
+            # Too long only in combination; each item may still fit on its own
+            break
+        except Exception as e:
+            return [apply_error(item, e, idx) for idx, item in batch]
+        break
+
+    if results is None:
+        # The whole batch was retried with backoff first, so a struggling
+        # provider only gets the per-item fan-out once that also failed
+        return [
+            process_item(
+                provider, provider_name, config, item, idx, pacer, cache, semantic_cache
+            )
+            for idx, item in batch
+        ]
+
+    lines = []
+    for (idx, item), raw in zip(batch, results):
+        try:
+            nli = parse_nli_result(raw)
+        except ValueError:
+            # Skipped or malformed verdict: ask again for this item alone
+            lines.append(
+                process_item(
+                    provider, provider_name, config, item, idx, pacer, cache, semantic_cache
+                )
+            )
+        else:
+            lines.append(apply_result(item, nli, idx))
+    return lines
+
+
+def batches_within_limit(
+    groups: Iterable[List[Tuple[int, Dict]]],
+    size: int,
+    prompt_version: str = DEFAULT_PROMPT_VERSION,
+) -> Iterator[List[List[Tuple[int, Dict]]]]:
+    """Yield runs of at most size groups whose batch prompt fits MAX_INPUT_TOKENS.
+
+    Each group is scored through its first item. Lengths are summed over the
+    parts build_batch_user_prompt joins, so the estimate is exactly that of
+    the prompt sent. A group too long even alone still gets its own batch,
+    where process_item reports it.
+    """
+    size = max(1, size)
+    base_chars = len(BATCH_INSTRUCTIONS.strip())
+    batch: List[List[Tuple[int, Dict]]] = []
+    chars = base_chars
+    for group in groups:
+        prompt_chars = len(build_user_prompt(group[0][1]))
+        # "\n\n" separator plus the "Item N:\n" header
+        item_chars = 2 + len(f"Item {len(batch) + 1}:\n") + prompt_chars
+        # Same arithmetic as estimate_tokens over the joined prompt
+        tokens = (
+            SYSTEM_PROMPT_TOKENS[prompt_version]
+            + (chars + item_chars) // CHARS_PER_TOKEN
+            + 1
+        )
+        if batch and (len(batch) >= size or tokens > MAX_INPUT_TOKENS):
+            yield batch
+            batch = []
+            chars = base_chars
+            item_chars = 2 + len("Item 1:\n") + prompt_chars
+        batch.append(group)
+        chars += item_chars
+    if batch:
+        yield batch
+
+
+def item_key(item: Dict) -> str:
+    """Stable key identifying an item by its (question, chunk, answer) triple."""
+    return make_cache_key(item.get("question"), item.get("chunk"), item.get("answer"))
+
+
+def is_scored(item: Dict) -> bool:
+    """Whether the item already carries a successful verdict from an earlier run."""
+    score = item.get("score")
+    return (
+        item.get("evaluate") in SCORED_LABELS
+        and isinstance(score, (int, float))
+        and score > 0
+    )
+
+
+def load_checkpoint(checkpoint_path: Path, namespace: str) -> Dict[str, Dict]:
+    """Load items a JSONL checkpoint scored under namespace, keyed by item_key.
+
+    Entries written under another provider, model, temperature or prompt are
+    ignored so a rerun with a different configuration scores them again.
+    """
+    if not checkpoint_path.exists():
+        return {}
+
+    raw = checkpoint_path.read_bytes()
+    complete_len = raw.rfind(b"\n") + 1
+    if complete_len < len(raw):
+        # Drop the partial line left behind by an interrupted write
+        os.truncate(checkpoint_path, complete_len)
+
+    scored: Dict[str, Dict] = {}
+    for line in raw[:complete_len].splitlines():
+        try:
+            item = json_utils.loads(line)
+        except json_utils.JSONDecodeError:
+            continue
+        if item.pop("checkpoint_namespace", None) == namespace:
+            scored[item_key(item)] = item
+    return scored
 
 
 def run_evaluation(config: EvaluatorConfig, provider: LLMProvider, provider_name: str) -> None:
@@ -311,60 +883,163 @@ def run_evaluation(config: EvaluatorConfig, provider: LLMProvider, provider_name
     
     # Auto-generate output filename
     output_path = input_path.with_name(f"{input_path.stem}_semantic_scored.json")
+    checkpoint_path = output_path.with_suffix(".jsonl")
+    # Verdicts are only reused, from the semantic cache or the checkpoint,
+    # when they were produced under the same model and prompt
+    namespace = make_cache_key(
+        provider_name,
+        getattr(provider, "model", ""),
+        config.temperature,
+        SYSTEM_PROMPTS[config.prompt_version],
+    )
+
+    semantic_cache: Optional[SemanticCache] = None
+    if config.semantic_cache:
+        try:
+            semantic_cache = SemanticCache(
+                min_similarity=config.cache_threshold,
+                path=DEFAULT_CACHE_PATH if config.use_cache else None,
+                namespace=namespace,
+            )
+        except ValueError as exc:
+            print(f"❌ {exc}")
+            return
 
     # Load data
-    data = json.loads(input_path.read_text(encoding="utf-8"))
+    data = json_utils.loads(input_path.read_bytes())
     total = len(data)
 
     print(f"Loaded: {input_path.name}")
     print(f"Total items: {total}")
     print(f"Provider: {provider_name.upper()}")
+    print(f"Prompt version: {config.prompt_version}")
+    print(f"Concurrency: {config.concurrency}")
+    if config.rpm or config.tpm:
+        print(f"Rate limit: {config.rpm or '-'} RPM, {config.tpm or '-'} TPM")
+    if config.batch_size > 1:
+        print(f"Batch size: {config.batch_size}")
+    print(f"Cache: {DEFAULT_CACHE_PATH if config.use_cache else 'disabled'}")
+    if semantic_cache:
+        print(
+            f"Semantic cache: similarity >= {semantic_cache.min_similarity} "
+            f"({semantic_cache.size()} entries)"
+        )
     if config.base_url:
         print(f"Custom URL: {config.base_url}")
     if config.model:
         print(f"Model: {config.model}")
-    print()
 
-    # Process each item
+    # Skip items scored by an earlier run, resume from the checkpoint of an
+    # interrupted run, and group the remaining items by triple so duplicates
+    # cost one LLM call
+    checkpoint = load_checkpoint(checkpoint_path, namespace)
+    groups: Dict[str, List[Tuple[int, Dict]]] = {}
+    skipped = 0
+    resumed = 0
     for idx, item in enumerate(data, start=1):
-        process_item(provider, provider_name, config, item, idx)
-        if idx < total:
-            time.sleep(config.sleep_time)
-
-    # Save results
-    output_path.write_text(
-        json.dumps(data, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+        if not config.force and is_scored(item):
+            skipped += 1
+            continue
+
+        key = item_key(item)
+        scored = checkpoint.get(key)
+        if scored:
+            for field in RESULT_FIELDS:
+                item[field] = scored.get(field)
+            resumed += 1
+        else:
+            groups.setdefault(key, []).append((idx, item))
+    if skipped:
+        print(f"Skipped: {skipped} (already scored, use --force to re-score)")
+    if resumed:
+        print(f"Resumed: {resumed} items from {checkpoint_path.name}")
+    pending = sum(len(group) for group in groups.values())
+    if pending > len(groups):
+        print(f"Deduped: {pending} → {len(groups)} unique triples")
+    print()
+
+    # Process items concurrently; results are written back into data in place
+    # and appended to the checkpoint as soon as each one completes
+    pacer = RequestPacer(config.sleep_time, config.rpm, config.tpm)
+    cache = ResponseCache() if config.use_cache else None
+    try:
+        with checkpoint_path.open("ab") as checkpoint_file, ThreadPoolExecutor(
+            max_workers=max(1, config.concurrency)
+        ) as executor:
+            futures = {
+                executor.submit(
+                    process_batch,
+                    provider,
+                    provider_name,
+                    config,
+                    [group[0] for group in batch],
+                    pacer,
+                    cache,
+                    semantic_cache,
+                ): batch
+                for batch in batches_within_limit(
+                    groups.values(), config.batch_size, config.prompt_version
+                )
+            }
+            try:
+                for future in as_completed(futures):
+                    for line, group in zip(future.result(), futures[future]):
+                        item = group[0][1]
+                        for _, duplicate in group[1:]:
+                            for field in RESULT_FIELDS:
+                                duplicate[field] = item[field]
+                        if len(group) > 1:
+                            line += f" (+{len(group) - 1} duplicates)"
+                        print(line)
+
+                        if item["evaluate"] != "error":
+                            entry = {**item, "checkpoint_namespace": namespace}
+                            checkpoint_file.write(json_utils.dumps(entry) + b"\n")
+                    checkpoint_file.flush()
+            except KeyboardInterrupt:
+                # Drop queued requests instead of waiting for all of them on exit;
+                # only the in-flight calls still finish
+                executor.shutdown(wait=False, cancel_futures=True)
+                print(f"\n⚠️  Interrupted, rerun to resume from {checkpoint_path.name}")
+                raise
+    finally:
+        if cache:
+            cache.close()
+        if semantic_cache:
+            semantic_cache.close()
+
+    # Save results; the checkpoint is no longer needed once the output exists
+    json_utils.dump_list(output_path, data)
+    checkpoint_path.unlink()
 
     # Print summary
     print(f"\n{'='*80}")
     print_statistics(data)
+    if provider.prompt_tokens:
+        cached_pct = provider.cached_prompt_tokens / provider.prompt_tokens * 100
+        print(
+            f"\nPrompt tokens: {provider.prompt_tokens} "
+            f"({provider.cached_prompt_tokens} served from provider cache, {cached_pct:.1f}%)"
+        )
     print(f"\n✅ Saved to: {output_path}")
 
 
 def print_statistics(data: List[Dict]) -> None:
     """Print evaluation statistics."""
-    evaluate_counts = {"correct": 0, "incorrect": 0, "unclear": 0, "error": 0}
-    score_sum = 0
-    score_count = 0
-    
-    # Score distribution
-    score_dist = {i: 0 for i in range(1, 11)}
-
-    for item in data:
-        evaluate = item.get("evaluate", "error")
-        evaluate_counts[evaluate] = evaluate_counts.get(evaluate, 0) + 1
+    if not data:
+        print("Evaluation Summary:")
+        print("   Total      : 0")
+        return
 
-        score = item.get("score", 0)
-        if score > 0:
-            score_sum += score
-            score_count += 1
-            if 1 <= score <= 10:
-                score_dist[score] += 1
+    evaluate_counts = Counter(item.get("evaluate", "error") for item in data)
+    # Tally scores once; the distribution and average both come from the tally
+    score_counts = Counter(item.get("score", 0) for item in data)
+    score_dist = {score: count for score, count in score_counts.items() if 1 <= score <= 10}
 
     total = len(data)
-    avg_score = score_sum / score_count if score_count > 0 else 0
+    scored = sum(count for score, count in score_counts.items() if score > 0)
+    score_sum = sum(score * count for score, count in score_counts.items() if score > 0)
+    avg_score = score_sum / scored if scored else 0
 
     print("Evaluation Summary:")
     print(f"   Total      : {total}")
@@ -376,7 +1051,7 @@ def print_statistics(data: List[Dict]) -> None:
     
     print("\nScore Distribution:")
     for score in range(10, 0, -1):
-        count = score_dist[score]
+        count = score_dist.get(score, 0)
         if count > 0:
             bar = "█" * int(count / total * 50)
             print(f"   {score:2d}: {count:3d} {bar}")
@@ -388,16 +1063,10 @@ def load_env_file(env_path: str = ENV_FILE) -> None:
     if not path.exists():
         return
 
-    for raw_line in path.read_text(encoding="utf-8").splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#") or "=" not in line:
-            continue
-
-        key, value = line.split("=", 1)
-        key = key.strip()
-        value = value.strip().strip('"').strip("'")
-        if key and key not in os.environ:
-            os.environ[key] = value
+    for match in ENV_LINE_PATTERN.finditer(path.read_text(encoding="utf-8")):
+        key = match.group(1)
+        value = match.group(2) or match.group(3) or match.group(4) or ""
+        os.environ.setdefault(key, value)
 
 
 def resolve_api_key(provider_name: str, cli_key: Optional[str]) -> Optional[str]:
@@ -438,6 +1107,10 @@ Examples:
   python evaluate.py --input qa_data.json --provider ollama \\
       --ollama-model qwen2.5:7b
 
+  # With 16 concurrent requests, 5 QA items per request
+  python evaluate.py --input qa_data.json --api-key YOUR_KEY \\
+      --concurrency 16 --batch-size 5
+
 Scoring:
   Score ≥ 6: PASS (answer can be used)
   Score = 5: BORDERLINE (unclear, don't use)
@@ -487,7 +1160,67 @@ Scoring:
         "--sleep",
         type=float,
         default=DEFAULT_SLEEP,
-        help=f"Sleep time between requests in seconds (default: {DEFAULT_SLEEP})",
+        help=(
+            "Minimum delay between request starts in seconds "
+            f"(default: {DEFAULT_SLEEP}; rate limits are handled by backing off on 429)"
+        ),
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Number of concurrent LLM requests (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=None,
+        help="Provider requests-per-minute quota to stay under (default: unlimited)",
+    )
+    parser.add_argument(
+        "--tpm",
+        type=int,
+        default=None,
+        help="Provider tokens-per-minute quota to stay under (default: unlimited)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Number of QA items scored per LLM request (default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Always call the LLM instead of reusing responses cached in {DEFAULT_CACHE_PATH}",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-score items that already have a verdict in the input file",
+    )
+    parser.add_argument(
+        "--semantic-cache",
+        action="store_true",
+        help="Reuse responses for near-duplicate items (requires sentence-transformers)",
+    )
+    parser.add_argument(
+        "--prompt-version",
+        choices=sorted(SYSTEM_PROMPTS),
+        default=DEFAULT_PROMPT_VERSION,
+        help=(
+            "System prompt revision; v2 is a compressed rubric with fewer input tokens "
+            f"(default: {DEFAULT_PROMPT_VERSION})"
+        ),
+    )
+    parser.add_argument(
+        "--cache-threshold",
+        type=float,
+        default=DEFAULT_MIN_SIMILARITY,
+        help=(
+            "Minimum cosine similarity for a --semantic-cache hit "
+            f"(default: {DEFAULT_MIN_SIMILARITY})"
+        ),
     )
 
     return parser
@@ -513,10 +1246,19 @@ def main() -> None:
         provider=provider_name,
         temperature=args.temperature,
         sleep_time=args.sleep,
+        concurrency=args.concurrency,
         ollama_model=env_ollama_model or args.ollama_model,
         ollama_url=env_ollama_url or args.ollama_url,
         base_url=args.base_url,
         model=args.model,
+        use_cache=not args.no_cache,
+        semantic_cache=args.semantic_cache,
+        cache_threshold=args.cache_threshold,
+        prompt_version=args.prompt_version,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        batch_size=args.batch_size,
+        force=args.force,
     )
 
     # Resolve API key if needed
@@ -539,6 +1281,7 @@ def main() -> None:
             ollama_url=config.ollama_url,
             ollama_model=config.ollama_model,
             ollama_timeout=OLLAMA_TIMEOUT,
+            ollama_num_ctx=OLLAMA_NUM_CTX,
             base_url=config.base_url,
             model=config.model,
         )
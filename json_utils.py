@@ -0,0 +1,62 @@
+"""
+JSON helpers backed by orjson when it is installed.
+"""
+import json
+from pathlib import Path
+from typing import Any, List, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Large enough that dump_list's per-item writes reach the OS in a few syscalls
+WRITE_BUFFER_SIZE = 1 << 20
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one except clause covers both
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON from str or UTF-8 bytes."""
+
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes, keeping non-ASCII text readable."""
+
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode(
+        "utf-8"
+    )
+
+
+def dump_list(path: Path, items: List[Any]) -> None:
+    """Write items as an indented JSON array, serializing one item at a time.
+
+    Output is identical to dumps(items, indent=True), but peak memory holds a
+    single item's encoding rather than the whole document. The array is
+    written to a temporary file that replaces path only once complete, so an
+    interrupted write never leaves a truncated file behind.
+    """
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb", buffering=WRITE_BUFFER_SIZE) as f:
+        if not items:
+            f.write(b"[]")
+        else:
+            f.write(b"[\n")
+            for idx, item in enumerate(items):
+                if idx:
+                    f.write(b",\n")
+                # Raw newlines only occur between JSON tokens, never inside strings
+                f.write(b"  " + dumps(item, indent=True).replace(b"\n", b"\n  "))
+            f.write(b"\n]")
+    tmp_path.replace(path)
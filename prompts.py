@@ -145,9 +145,9 @@ YÊU CẦU TÍNH DUY NHẤT (CRITICAL):
 - Kiểm tra kỹ: 2 câu hỏi không được hỏi về CÙNG MỘT thông tin
 
 YÊU CẦU SỐ LƯỢNG (BẮT BUỘC):
-- PHẢI tạo CHÍNH XÁC {num_questions} câu hỏi
+- PHẢI tạo CHÍNH XÁC số câu hỏi được yêu cầu ở cuối
 - Mỗi câu hỏi PHẢI có answer_location tồn tại NGUYÊN VĂN trong tài liệu
-- KHÔNG trả ít hơn {num_questions}
+- KHÔNG trả ít hơn số câu hỏi được yêu cầu
 - KHÔNG tạo câu hỏi nếu không tìm được câu trả lời rõ ràng
 - Nếu một câu hỏi không chắc chắn → chọn câu khác
 
@@ -175,13 +175,31 @@ NHẮC LẠI: MỌI CÂU HỎI PHẢI BẰNG TIẾNG VIỆT.
 """
 
 
-def build_user_prompt(
-    document_content: str, document_name: str, num_questions: int
-) -> str:
+# The count is the only part that changes between retries, so it is kept
+# out of the document prompt and sent last; the document prompt stays a
+# byte-identical prefix that provider-side prompt caching can reuse
+QUANTITY_PROMPT_TEMPLATE: Final[str] = (
+    "Hãy tạo CHÍNH XÁC {num_questions} câu hỏi theo các yêu cầu trên. CHỈ trả về JSON."
+)
+
+
+# The document goes between a header holding the only placeholder and a
+# constant footer, so each prompt is a replace and a concatenation instead
+# of a format() pass over the whole template and document
+_PROMPT_HEADER, _PROMPT_FOOTER = (
+    part.replace("{{", "{").replace("}}", "}")
+    for part in USER_PROMPT_TEMPLATE.split("{document_content}")
+)
+
+
+def build_document_prompt(document_content: str, document_name: str) -> str:
     """Fill the prompt template with document metadata and content."""
 
-    return USER_PROMPT_TEMPLATE.format(
-        document_name=document_name,
-        num_questions=num_questions,
-        document_content=document_content,
-    )
+    header = _PROMPT_HEADER.replace("{document_name}", document_name)
+    return header + document_content + _PROMPT_FOOTER
+
+
+def build_quantity_prompt(num_questions: int) -> str:
+    """Return the instruction asking for num_questions questions."""
+
+    return QUANTITY_PROMPT_TEMPLATE.format(num_questions=num_questions)
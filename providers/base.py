@@ -1,6 +1,7 @@
 """
 Provider interface for LLM backends.
 """
+import threading
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 
@@ -9,13 +10,37 @@ class LLMProvider(ABC):
     """Common interface for LLM providers."""
 
     def __init__(self) -> None:
-        self.last_error: Optional[str] = None
+        # One provider serves many worker threads; each chat() call's error is
+        # kept per thread so concurrent calls never read or clear each other's
+        self._error_state = threading.local()
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self._usage_lock = threading.Lock()
+
+    @property
+    def last_error(self) -> Optional[str]:
+        """Error from the last chat() call made on the current thread."""
+        return getattr(self._error_state, "last_error", None)
+
+    @last_error.setter
+    def last_error(self, error: Optional[str]) -> None:
+        self._error_state.last_error = error
 
     def clear_error(self) -> None:
         self.last_error = None
 
+    def record_usage(self, prompt_tokens: int, cached_tokens: int = 0) -> None:
+        """Accumulate prompt token counts reported by the API, including cache hits."""
+        with self._usage_lock:
+            self.prompt_tokens += prompt_tokens
+            self.cached_prompt_tokens += cached_tokens
+
     @abstractmethod
     def chat(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
-        """Return raw text response. Empty string on failure."""
+        """Return raw text response. Empty string on failure.
+
+        Providers accept OpenAI-style ``response_format={"type": "json_object"}``
+        and map it to their own JSON mode where one exists.
+        """
 
         raise NotImplementedError
@@ -0,0 +1,165 @@
+"""
+Exact and semantic caches for raw LLM responses.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+from typing import Any, List, Optional
+
+DEFAULT_CACHE_PATH = ".llm_cache.db"
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_MIN_SIMILARITY = 0.95
+
+NUMERIC_TOKEN_PATTERN = re.compile(r"\d+%|\d+")
+
+
+def make_cache_key(*parts: object) -> str:
+    """Hash request parts into a short, stable cache key."""
+
+    raw = "|".join(str(part) for part in parts)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed key/value store for raw response text."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, response TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, response: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response) VALUES (?, ?)",
+                (key, response),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SemanticCache:
+    """Nearest-neighbour cache over prompt embeddings.
+
+    A cached response is reused only when the cosine similarity to the closest
+    cached prompt is at least ``min_similarity`` and both prompts contain the
+    same numeric tokens, so "3%" vs "5%" never collide. Entries are persisted
+    to SQLite when ``path`` is given and reloaded for the same embedding model
+    and ``namespace``; callers derive the namespace from whatever else the
+    response depends on (provider, model, system prompt).
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+        min_similarity: float = DEFAULT_MIN_SIMILARITY,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        namespace: str = "",
+    ) -> None:
+        try:
+            import numpy
+            from sentence_transformers import SentenceTransformer
+        except ImportError as exc:
+            raise ValueError(
+                "sentence-transformers library not installed. "
+                "Run: pip install sentence-transformers"
+            ) from exc
+
+        self.model_name = model_name
+        self.namespace = namespace
+        self.min_similarity = min_similarity
+        self._np = numpy
+        self._model = SentenceTransformer(model_name)
+        self._lock = threading.Lock()
+        self._matrix: Any = None
+        self._prompts: List[str] = []
+        self._responses: List[str] = []
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            self._load(path)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._prompts)
+
+    def _load(self, path: str) -> None:
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS semantic_responses "
+            "(model TEXT NOT NULL, namespace TEXT NOT NULL, prompt TEXT NOT NULL, "
+            "response TEXT NOT NULL, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+        rows = self._conn.execute(
+            "SELECT prompt, response, vector FROM semantic_responses "
+            "WHERE model = ? AND namespace = ?",
+            (self.model_name, self.namespace),
+        ).fetchall()
+        if rows:
+            self._prompts = [row[0] for row in rows]
+            self._responses = [row[1] for row in rows]
+            vectors = self._np.frombuffer(
+                b"".join(row[2] for row in rows), dtype=self._np.float32
+            )
+            self._matrix = vectors.reshape(len(rows), -1)
+
+    def embed(self, prompt: str) -> Any:
+        with self._lock:
+            return self._model.encode(prompt, normalize_embeddings=True)
+
+    def get(self, prompt: str, vector: Any) -> Optional[str]:
+        with self._lock:
+            if self._matrix is None:
+                return None
+            similarities = self._matrix @ vector
+            best = int(similarities.argmax())
+            if float(similarities[best]) < self.min_similarity:
+                return None
+            cached_prompt = self._prompts[best]
+            response = self._responses[best]
+
+        if NUMERIC_TOKEN_PATTERN.findall(prompt) != NUMERIC_TOKEN_PATTERN.findall(
+            cached_prompt
+        ):
+            return None
+        return response
+
+    def add(self, prompt: str, vector: Any, response: str) -> None:
+        row = vector.astype(self._np.float32).reshape(1, -1)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = row
+            else:
+                self._matrix = self._np.vstack([self._matrix, row])
+            self._prompts.append(prompt)
+            self._responses.append(response)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT INTO semantic_responses "
+                    "(model, namespace, prompt, response, vector) VALUES (?, ?, ?, ?, ?)",
+                    (self.model_name, self.namespace, prompt, response, row.tobytes()),
+                )
+                self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -7,15 +7,15 @@ from config import (
     DEFAULT_OLLAMA_MODEL,
     DEFAULT_OLLAMA_URL,
     DEFAULT_PROVIDER,
+    OLLAMA_KEEP_ALIVE,
     OLLAMA_TIMEOUT,
     PROVIDER_CONFIGS,
     PROVIDER_KIND_MAP,
 )
 from providers.base import LLMProvider
-from providers.llm_api.anthropic_provider import AnthropicProvider
-from providers.llm_api.deepseek_provider import DeepSeekProvider
-from providers.llm_api.openai_provider import OpenAIProvider
-from providers.llm_local.ollama_provider import OllamaProvider
+
+# Provider modules are imported inside create_provider so a run only pays for
+# the HTTP client or SDK of the provider it actually uses.
 
 
 def normalize_provider_name(provider_name: str) -> str:
@@ -32,6 +32,7 @@ def create_provider(
     ollama_url: str = DEFAULT_OLLAMA_URL,
     ollama_model: str = DEFAULT_OLLAMA_MODEL,
     ollama_timeout: int = OLLAMA_TIMEOUT,
+    ollama_num_ctx: Optional[int] = None,
     base_url: Optional[str] = None,
     model: Optional[str] = None,
 ) -> LLMProvider:
@@ -45,11 +46,15 @@ def create_provider(
         if normalized == "anthropic":
             if not api_key:
                 raise ValueError("API key required for anthropic provider")
+            from providers.llm_api.anthropic_provider import AnthropicProvider
+
             effective_model = model or config.model
             return AnthropicProvider(api_key=api_key, model=effective_model)
         if normalized == "deepseek":
             if not api_key:
                 raise ValueError("API key required for deepseek provider")
+            from providers.llm_api.deepseek_provider import DeepSeekProvider
+
             # Use custom base_url if provided, otherwise use config default
             effective_base_url = base_url or config.base_url
             effective_model = model or config.model
@@ -60,6 +65,8 @@ def create_provider(
             )
         if not api_key:
             raise ValueError(f"API key required for {normalized} provider")
+        from providers.llm_api.openai_provider import OpenAIProvider
+
         # Use custom base_url if provided, otherwise use config default
         effective_base_url = base_url or config.base_url
         effective_model = model or config.model
@@ -71,10 +78,14 @@ def create_provider(
         )
 
     if provider_kind == "local":
+        from providers.llm_local.ollama_provider import OllamaProvider
+
         return OllamaProvider(
             base_url=ollama_url,
             model=ollama_model,
             timeout=ollama_timeout,
+            num_ctx=ollama_num_ctx,
+            keep_alive=OLLAMA_KEEP_ALIVE,
         )
 
     raise ValueError(f"Unsupported provider: {provider_name}")
\ No newline at end of file
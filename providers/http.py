@@ -0,0 +1,191 @@
+"""
+Pooled HTTP sessions and rate-limit backoff for the HTTP-based providers.
+"""
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import json_utils
+
+DEFAULT_POOL_SIZE = 32
+RATE_LIMIT_STATUSES = {429, 503}
+MAX_RATE_LIMIT_RETRIES = 3
+MAX_RETRY_WAIT = 60.0
+# Transient gateway errors and dropped connections are retried by urllib3;
+# 429/503 are left to post_with_backoff, which honours rate-limit headers
+TRANSIENT_STATUSES = (500, 502, 504)
+MAX_TRANSIENT_RETRIES = 3
+TRANSIENT_BACKOFF_FACTOR = 0.5
+
+DURATION_PART_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Return a session that keeps up to pool_size connections alive per host.
+
+    Connection failures and 500/502/504 responses are retried with
+    exponential backoff. Read timeouts are not retried, since the server
+    may still be generating (and billing) the first attempt.
+    """
+
+    retry = Retry(
+        total=MAX_TRANSIENT_RETRIES,
+        connect=MAX_TRANSIENT_RETRIES,
+        read=0,
+        status=MAX_TRANSIENT_RETRIES,
+        status_forcelist=TRANSIENT_STATUSES,
+        allowed_methods=None,  # chat completions are POSTs
+        backoff_factor=TRANSIENT_BACKOFF_FACTOR,
+        raise_on_status=False,
+        # Otherwise urllib3 also retries 429/503 whenever Retry-After is set,
+        # sleeping the full header value, on top of post_with_backoff's loop
+        respect_retry_after_header=False,
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@lru_cache(maxsize=8)
+def encode_system_message(content: str) -> bytes:
+    """Serialize a system message once; its content str caches its own hash."""
+
+    return json_utils.dumps({"role": "system", "content": content})
+
+
+def encode_message(message: Mapping[str, Any]) -> bytes:
+    if (
+        message.get("role") == "system"
+        and isinstance(message.get("content"), str)
+        and len(message) == 2
+    ):
+        return encode_system_message(message["content"])
+    return json_utils.dumps(message)
+
+
+def encode_chat_body(payload: Dict[str, Any]) -> bytes:
+    """Serialize a chat request body as UTF-8 JSON.
+
+    The shared system prompt is encoded once and spliced in, and non-ASCII
+    text is sent as UTF-8 rather than \\u escapes, which roughly halves the
+    body size for Vietnamese prompts.
+    """
+
+    fields = {key: value for key, value in payload.items() if key != "messages"}
+    messages = b",".join(encode_message(message) for message in payload["messages"])
+    head = json_utils.dumps(fields)[:-1]
+    separator = b"," if fields else b""
+    return head + separator + b'"messages":[' + messages + b"]}"
+
+
+_shared_session: Optional[requests.Session] = None
+_shared_session_lock = threading.Lock()
+_sdk_http_client: Any = None
+
+
+def shared_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use.
+
+    Sharing one session keeps connections alive across provider instances
+    and helpers such as list_models, not just across one provider's calls.
+    """
+
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
+
+
+def sdk_http_client() -> Any:
+    """Return a process-wide httpx client for the OpenAI and Anthropic SDKs.
+
+    Uses HTTP/2 when the optional h2 package is installed, so concurrent
+    requests share one TLS connection; otherwise a pooled HTTP/1.1 client.
+    Returns None when httpx itself is missing, letting the SDK use its default.
+    """
+
+    global _sdk_http_client
+    with _shared_session_lock:
+        if _sdk_http_client is None:
+            try:
+                import httpx
+            except ImportError:
+                return None
+
+            limits = httpx.Limits(
+                max_connections=DEFAULT_POOL_SIZE,
+                max_keepalive_connections=DEFAULT_POOL_SIZE,
+            )
+            try:
+                _sdk_http_client = httpx.Client(
+                    http2=True, limits=limits, follow_redirects=True
+                )
+            except ImportError:
+                _sdk_http_client = httpx.Client(limits=limits, follow_redirects=True)
+        return _sdk_http_client
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parse reset durations such as "20ms", "1.5s" or "6m0s" into seconds."""
+
+    parts = DURATION_PART_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Return how long the server asks us to wait, or None if it doesn't say."""
+
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return max(0.0, retry_at.timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    if response.headers.get("x-ratelimit-remaining-requests") == "0":
+        return parse_duration(response.headers.get("x-ratelimit-reset-requests", ""))
+    return None
+
+
+def post_with_backoff(
+    session: requests.Session, url: str, **kwargs: Any
+) -> requests.Response:
+    """POST, waiting only when the server signals a rate limit.
+
+    429/503 responses are retried after the advertised Retry-After (or an
+    exponential fallback). A successful response that exhausts the request
+    quota waits for the quota reset before returning, so the next call
+    does not trip the limit.
+    """
+
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        response = session.post(url, **kwargs)
+        delay = retry_after_seconds(response)
+
+        if response.status_code not in RATE_LIMIT_STATUSES:
+            if delay:
+                time.sleep(min(delay, MAX_RETRY_WAIT))
+            return response
+        if attempt == MAX_RATE_LIMIT_RETRIES:
+            return response
+
+        time.sleep(min(delay if delay is not None else 2.0**attempt, MAX_RETRY_WAIT))
+
+    return response
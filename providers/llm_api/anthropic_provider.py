@@ -1,10 +1,21 @@
 """
 Anthropic API provider implementation.
 """
+import json
+import threading
 from typing import Any, Dict, List
 
 from providers.base import LLMProvider
 
+# Anthropic has no JSON mode; forcing a call to a tool whose input is any
+# object makes the model emit a bare JSON document instead of prose
+JSON_TOOL_NAME = "json_output"
+JSON_TOOL = {
+    "name": JSON_TOOL_NAME,
+    "description": "Return the response as a JSON object.",
+    "input_schema": {"type": "object"},
+}
+
 
 class AnthropicProvider(LLMProvider):
     """Provider for Anthropic Claude chat API."""
@@ -13,27 +24,68 @@ class AnthropicProvider(LLMProvider):
         super().__init__()
         self.api_key = api_key
         self.model = model
+        self._client: Any = None
+        self._client_lock = threading.Lock()
+
+    def _get_client(self) -> Any:
+        """Build the SDK client on first use; raises ImportError if anthropic is missing."""
+        with self._client_lock:
+            if self._client is None:
+                import anthropic
+
+                from providers.http import sdk_http_client
+
+                client_kwargs: Dict[str, Any] = {"api_key": self.api_key}
+                http_client = sdk_http_client()
+                if http_client is not None:
+                    client_kwargs["http_client"] = http_client
+                self._client = anthropic.Anthropic(**client_kwargs)
+            return self._client
 
     def chat(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
         self.clear_error()
         try:
-            import anthropic
+            client = self._get_client()
         except ImportError:
             print("❌ Anthropic library not installed. Run: pip install anthropic")
             self.last_error = "missing_anthropic_library"
             return ""
 
         try:
-            client = anthropic.Anthropic(api_key=self.api_key)
             max_tokens = kwargs.get("max_tokens")
             payload: Dict[str, Any] = {
                 "model": self.model,
                 "max_tokens": max_tokens if max_tokens is not None else 4000,
-                "messages": messages,
+                "messages": [m for m in messages if m["role"] != "system"],
             }
+            # Anthropic takes the system prompt as a top-level param; marking it
+            # cacheable lets repeated calls reuse the prefilled prefix
+            system_texts = [m["content"] for m in messages if m["role"] == "system"]
+            if system_texts:
+                payload["system"] = [
+                    {
+                        "type": "text",
+                        "text": "\n\n".join(system_texts),
+                        "cache_control": {"type": "ephemeral"},
+                    }
+                ]
+            response_format = kwargs.get("response_format")
+            json_mode = bool(response_format) and response_format.get("type") == "json_object"
+            if json_mode:
+                payload["tools"] = [JSON_TOOL]
+                payload["tool_choice"] = {"type": "tool", "name": JSON_TOOL_NAME}
+
             message = client.messages.create(**payload)
+            usage = message.usage
+            cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+            cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+            self.record_usage(usage.input_tokens + cache_read + cache_write, cache_read)
             if not message.content:
                 return ""
+            if json_mode:
+                for block in message.content:
+                    if block.type == "tool_use":
+                        return json.dumps(block.input, ensure_ascii=False)
             return message.content[0].text
 
         except Exception as exc:
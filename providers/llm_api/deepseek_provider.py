@@ -1,17 +1,19 @@
 """
 DeepSeek API provider implementation.
 """
-import json
-import urllib.error
-import urllib.request
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import requests
+
+import json_utils
 from providers.base import LLMProvider
+from providers.http import encode_chat_body, post_with_backoff, shared_session
 
 DEFAULT_TIMEOUT = 360
 
 
 def call_openai_compat(
+    session: requests.Session,
     base_url: str,
     api_key: str,
     model: str,
@@ -19,23 +21,37 @@ def call_openai_compat(
     temperature: float,
     max_tokens: int,
     timeout: int,
-) -> str:
+    response_format: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """Return the reply text and the usage block of an OpenAI-compatible chat call."""
     url = base_url.rstrip("/") + "/chat/completions"
-    payload = {
+    payload: Dict[str, Any] = {
         "model": model,
         "messages": messages,
         "temperature": temperature,
         "max_tokens": max_tokens,
     }
-    data = json.dumps(payload).encode("utf-8")
+    if response_format:
+        payload["response_format"] = response_format
+    data = encode_chat_body(payload)
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {api_key}",
     }
-    request = urllib.request.Request(url, data=data, headers=headers, method="POST")
-    with urllib.request.urlopen(request, timeout=timeout) as response:
-        result = json.loads(response.read().decode("utf-8"))
-    return result["choices"][0]["message"]["content"]
+    response = post_with_backoff(
+        session, url, data=data, headers=headers, timeout=timeout
+    )
+    response.raise_for_status()
+    result = json_utils.loads(response.content)
+    return result["choices"][0]["message"]["content"], result.get("usage") or {}
+
+
+def cached_prompt_tokens(usage: Dict[str, Any]) -> int:
+    """Read prompt-cache hits from DeepSeek or OpenAI style usage fields."""
+    if "prompt_cache_hit_tokens" in usage:
+        return usage["prompt_cache_hit_tokens"] or 0
+    details = usage.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens") or 0
 
 
 class DeepSeekProvider(LLMProvider):
@@ -53,6 +69,7 @@ class DeepSeekProvider(LLMProvider):
         self.model = model
         self.base_url = base_url or "https://api.deepseek.com"
         self.timeout = timeout
+        self.session = shared_session()
 
     def chat(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
         self.clear_error()
@@ -66,7 +83,8 @@ class DeepSeekProvider(LLMProvider):
             if temperature is None:
                 temperature = 0.7
 
-            return call_openai_compat(
+            content, usage = call_openai_compat(
+                session=self.session,
                 base_url=self.base_url,
                 api_key=self.api_key,
                 model=self.model,
@@ -74,7 +92,10 @@ class DeepSeekProvider(LLMProvider):
                 temperature=temperature,
                 max_tokens=max_tokens,
                 timeout=timeout,
+                response_format=kwargs.get("response_format"),
             )
+            self.record_usage(usage.get("prompt_tokens") or 0, cached_prompt_tokens(usage))
+            return content
         except Exception as exc:
             print(f"❌ DeepSeek API error: {exc}")
             self.last_error = str(exc)
@@ -1,6 +1,7 @@
 """
 OpenAI API provider implementation.
 """
+import threading
 from typing import Any, Dict, List, Optional
 
 from providers.base import LLMProvider
@@ -21,22 +22,36 @@ class OpenAIProvider(LLMProvider):
         self.api_key = api_key
         self.model = model
         self.base_url = base_url
+        self._client: Any = None
+        self._client_lock = threading.Lock()
+
+    def _get_client(self) -> Any:
+        """Build the SDK client on first use; raises ImportError if openai is missing."""
+        with self._client_lock:
+            if self._client is None:
+                from openai import OpenAI
+
+                from providers.http import sdk_http_client
+
+                client_kwargs: Dict[str, Any] = {"api_key": self.api_key}
+                if self.base_url:
+                    client_kwargs["base_url"] = self.base_url
+                http_client = sdk_http_client()
+                if http_client is not None:
+                    client_kwargs["http_client"] = http_client
+                self._client = OpenAI(**client_kwargs)
+            return self._client
 
     def chat(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
         self.clear_error()
         try:
-            from openai import OpenAI
+            client = self._get_client()
         except ImportError:
             print("❌ OpenAI library not installed. Run: pip install openai")
             self.last_error = "missing_openai_library"
             return ""
 
         try:
-            client_kwargs: Dict[str, Any] = {"api_key": self.api_key}
-            if self.base_url:
-                client_kwargs["base_url"] = self.base_url
-
-            client = OpenAI(**client_kwargs)
             params: Dict[str, Any] = {
                 "model": self.model,
                 "messages": messages,
@@ -45,8 +60,17 @@ class OpenAIProvider(LLMProvider):
                 params["max_tokens"] = kwargs["max_tokens"]
             if "temperature" in kwargs and kwargs["temperature"] is not None:
                 params["temperature"] = kwargs["temperature"]
+            if kwargs.get("response_format"):
+                params["response_format"] = kwargs["response_format"]
 
             response = client.chat.completions.create(**params)
+            usage = response.usage
+            if usage:
+                details = getattr(usage, "prompt_tokens_details", None)
+                self.record_usage(
+                    usage.prompt_tokens or 0,
+                    getattr(details, "cached_tokens", None) or 0,
+                )
             return response.choices[0].message.content or ""
 
         except Exception as exc:
@@ -1,45 +1,82 @@
 """
 Ollama local provider implementation.
 """
-import json
-import urllib.error
-import urllib.request
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Union
 
+import json_utils
 from providers.base import LLMProvider
+from providers.http import encode_chat_body, shared_session
 
 
 class OllamaProvider(LLMProvider):
     """Provider for Ollama local chat API."""
 
-    def __init__(self, base_url: str, model: str, timeout: int = 60) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        timeout: int = 60,
+        num_ctx: Optional[int] = None,
+        keep_alive: Optional[Union[str, int]] = None,
+    ) -> None:
         super().__init__()
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.timeout = timeout
+        self.num_ctx = num_ctx
+        self.keep_alive = keep_alive
+        self.session = shared_session()
 
     def chat(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
         self.clear_error()
         payload: Dict[str, Any] = {
             "model": self.model,
             "messages": messages,
-            "stream": False,
+            "stream": True,
         }
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+
+        # Ollama takes sampling limits as model options, not top-level fields
+        options: Dict[str, Any] = {}
+        if self.num_ctx is not None:
+            options["num_ctx"] = self.num_ctx
+        if kwargs.get("temperature") is not None:
+            options["temperature"] = kwargs["temperature"]
+        if kwargs.get("max_tokens") is not None:
+            options["num_predict"] = kwargs["max_tokens"]
         if "options" in kwargs and kwargs["options"] is not None:
-            payload["options"] = kwargs["options"]
+            options.update(kwargs["options"])
+        if options:
+            payload["options"] = options
+        response_format = kwargs.get("response_format")
+        if response_format and response_format.get("type") == "json_object":
+            payload["format"] = "json"
 
         url = f"{self.base_url}/api/chat"
-        data = json.dumps(payload).encode("utf-8")
-        request = urllib.request.Request(url, data=data, method="POST")
-        request.add_header("Content-Type", "application/json")
+        data = encode_chat_body(payload)
+        headers = {"Content-Type": "application/json"}
 
         try:
-            with urllib.request.urlopen(request, timeout=self.timeout) as response:
-                body = response.read().decode("utf-8")
+            # Streamed replies arrive as one JSON object per line, so content is
+            # decoded while the model is still generating instead of after the
+            # whole body is buffered; the timeout applies per read, not in total
+            with self.session.post(
+                url, data=data, headers=headers, timeout=self.timeout, stream=True
+            ) as response:
+                response.raise_for_status()
 
-            response_data = json.loads(body)
-            message = response_data.get("message", {})
-            return message.get("content", "")
+                parts: List[str] = []
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json_utils.loads(line)
+                    if "error" in chunk:
+                        raise ValueError(chunk["error"])
+                    parts.append(chunk.get("message", {}).get("content", ""))
+                    if chunk.get("done"):
+                        break
+                return "".join(parts)
 
         except Exception as exc:
             print(f"❌ Ollama API error: {exc}")
@@ -51,13 +88,12 @@ def list_models(base_url: str, timeout: int = 10) -> List[str]:
     """Return available Ollama models, or empty list on error."""
 
     url = f"{base_url.rstrip('/')}/api/tags"
-    request = urllib.request.Request(url, method="GET")
 
     try:
-        with urllib.request.urlopen(request, timeout=timeout) as response:
-            body = response.read().decode("utf-8")
+        response = shared_session().get(url, timeout=timeout)
+        response.raise_for_status()
 
-        data = json.loads(body)
+        data = json_utils.loads(response.content)
         models = data.get("models", [])
         return [model.get("name") for model in models if model.get("name")]
 
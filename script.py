@@ -3,14 +3,19 @@ RAG Evaluation Dataset Generator with LLM
 Generates Vietnamese questions based on 4W1H framework (What, Why, When, How)
 """
 import argparse
+import codecs
 import json
+import mmap
 import os
 import re
-from dataclasses import dataclass, asdict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+import json_utils
 from config import (
+    DATACLASS_SLOTS,
     DEFAULT_NUM_QUESTIONS,
     DEFAULT_OLLAMA_MODEL,
     DEFAULT_OLLAMA_URL,
@@ -23,17 +28,68 @@ from config import (
     PROVIDER_KIND_MAP,
     TEMPERATURE,
 )
-from prompts import SYSTEM_MESSAGE, build_user_prompt
+from prompts import (
+    SYSTEM_MESSAGE,
+    USER_PROMPT_TEMPLATE,
+    build_document_prompt,
+    build_quantity_prompt,
+)
 from providers.base import LLMProvider
+from providers.cache import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_MIN_SIMILARITY,
+    ResponseCache,
+    SemanticCache,
+    make_cache_key,
+)
 from providers.factory import create_provider, normalize_provider_name
 
+JSON_DECODER = json.JSONDecoder()
 JSON_LIST_PATTERN = re.compile(r"\[.*\]", re.DOTALL)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# A valid escape (group 1), or a lone backslash that must be doubled
+JSON_ESCAPE_PATTERN = re.compile(r'(\\(?:[\\"/bfnrt]|u[0-9a-fA-F]{4}))|\\')
+
+# Keywords per question type, in priority order
+QUESTION_TYPE_KEYWORDS = (
+    ("who", ("ai ", "ai là ", "ai chịu", "ai có trách nhiệm")),
+    ("where", ("ở đâu", "tại đâu", "thuộc đâu", "áp dụng ở")),
+    ("when", ("khi nào", "thời gian", "thời điểm", "lúc nào", "deadline")),
+    ("why", ("tại sao", "vì sao", "lý do")),
+    ("how", ("như thế nào", "làm thế nào", "làm sao", "cách")),
+    ("condition", ("điều kiện", "trường hợp", "khi nào thì", "nếu", "ngoại lệ")),
+    ("list", ("gồm những", "bao gồm", "liệt kê", "các bước", "những gì")),
+    ("what", ("là gì", "gì", "nội dung")),
+)
+QUESTION_KEYWORD_RANKS = {
+    keyword: (rank, q_type)
+    for rank, (q_type, keywords) in enumerate(QUESTION_TYPE_KEYWORDS)
+    for keyword in keywords
+}
+# One pass over the question finds every keyword: the lookahead matches at
+# each position without consuming it, so overlapping keywords are all seen,
+# and alternatives are tried in priority order where several start together
+QUESTION_KEYWORD_PATTERN = re.compile(
+    "(?=(" + "|".join(map(re.escape, QUESTION_KEYWORD_RANKS)) + "))"
+)
+# Documents are compared on their opening text with a multilingual model,
+# since the knowledge base is mostly Vietnamese
+DOCUMENT_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+DOCUMENT_EMBEDDING_CHARS = 8192
+# Upper bound on retries in flight at once, to stay clear of provider rate limits
+MAX_PARALLEL_RETRIES = 4
 PREVIEW_COUNT = 5
 PREVIEW_CHUNK_LEN = 200
 ENV_FILE = ".env"
+# KEY=value with optional single or double quotes around the value
+ENV_LINE_PATTERN = re.compile(
+    r"^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*"
+    r"""(?:"([^"\n]*)"|'([^'\n]*)'|([^\n]*?))[ \t\r]*$""",
+    re.MULTILINE,
+)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class QAPair:
     """Question-Answer pair with context."""
 
@@ -45,8 +101,20 @@ class QAPair:
     score: str = ""
     check: str = ""
 
+    def to_dict(self) -> Dict[str, str]:
+        # Flat fields only, so skip asdict()'s recursive deep copy
+        return {
+            "question": self.question,
+            "file": self.file,
+            "chunk": self.chunk,
+            "answer": self.answer,
+            "evaluate": self.evaluate,
+            "score": self.score,
+            "check": self.check,
+        }
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class AppConfig:
     """Runtime configuration for the generator."""
 
@@ -63,7 +131,19 @@ class AppConfig:
 
 
 def parse_json_list(response_text: str) -> List[Dict]:
-    """Extract and parse the first JSON list from a response."""
+    """Extract and parse the first JSON list of objects from a response."""
+
+    # Decode from each "[" in turn so a bracket in the prose before the list
+    # ("tạo [2] câu hỏi") or a stray "]" after it does not spoil the parse
+    start = response_text.find("[")
+    while start != -1:
+        try:
+            items, _ = JSON_DECODER.raw_decode(response_text, start)
+        except json.JSONDecodeError:
+            items = None
+        if is_object_list(items):
+            return items
+        start = response_text.find("[", start + 1)
 
     json_match = JSON_LIST_PATTERN.search(response_text)
     if not json_match:
@@ -71,55 +151,53 @@ def parse_json_list(response_text: str) -> List[Dict]:
 
     raw_json = json_match.group(0)
     try:
-        return json.loads(raw_json)
-    except json.JSONDecodeError:
+        items = json_utils.loads(raw_json)
+    except json_utils.JSONDecodeError:
         repaired = repair_invalid_json_escapes(raw_json)
         try:
-            return json.loads(repaired)
-        except json.JSONDecodeError as exc:
+            items = json_utils.loads(repaired)
+        except json_utils.JSONDecodeError as exc:
             print(f"⚠️  Invalid JSON returned by LLM: {exc}")
             return []
+    return items if is_object_list(items) else []
+
+
+def is_object_list(value: object) -> bool:
+    """Whether value is a JSON array whose items are all objects."""
+
+    return isinstance(value, list) and all(isinstance(item, dict) for item in value)
 
 
 def repair_invalid_json_escapes(raw_json: str) -> str:
     """Best-effort fix for invalid backslash escapes in JSON strings."""
 
-    valid_escapes = {'"', "\\", "/", "b", "f", "n", "r", "t"}
-    chars: List[str] = []
-    idx = 0
-
-    while idx < len(raw_json):
-        ch = raw_json[idx]
-        if ch != "\\":
-            chars.append(ch)
-            idx += 1
-            continue
-
-        if idx + 1 >= len(raw_json):
-            chars.append("\\\\")
-            idx += 1
-            continue
-
-        nxt = raw_json[idx + 1]
-        if nxt in valid_escapes:
-            chars.append(ch)
-            chars.append(nxt)
-            idx += 2
-            continue
-
-        if nxt == "u" and idx + 5 < len(raw_json):
-            hex_part = raw_json[idx + 2 : idx + 6]
-            if all(c in "0123456789abcdefABCDEF" for c in hex_part):
-                chars.append(ch)
-                chars.append(nxt)
-                chars.append(hex_part)
-                idx += 6
-                continue
+    return JSON_ESCAPE_PATTERN.sub(_escape_backslash, raw_json)
+
+
+def _escape_backslash(match: "re.Match[str]") -> str:
+    # Valid escapes are consumed whole, so an escaped backslash is never doubled
+    return match.group(1) or "\\\\"
+
 
-        chars.append("\\\\")
-        idx += 1
+def read_document(path: Path) -> str:
+    """Decode a UTF-8 file, dropping undecodable bytes, without a bytes copy.
 
-    return "".join(chars)
+    The file is memory-mapped and decoded straight from the page cache, so
+    peak memory holds the decoded text rather than the raw bytes as well.
+    """
+
+    with path.open("rb") as f:
+        # mmap rejects empty files
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                text = codecs.decode(view, "utf-8", "ignore")
+
+    # Match read_text()'s universal-newline translation
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
 
 
 class QuestionGenerator:
@@ -130,16 +208,22 @@ class QuestionGenerator:
         document_path: str,
         provider: LLMProvider,
         provider_name: str,
-        max_doc_tokens: int = 50000
+        max_doc_tokens: int = 50000,
+        cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
     ):
         self.document_path = Path(document_path)
         self.provider = provider
         self.provider_name = provider_name
         self.max_doc_tokens = max_doc_tokens
-
-        raw_content = self.document_path.read_text(
-            encoding="utf-8", errors="ignore"
-        )
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        # Keys already answered this run; a retry with the same prompt wants a fresh sample
+        self._requested_keys: Set[str] = set()
+        # Retries tend to quote the same passages again; each is searched once
+        self._chunk_matches: Dict[str, str] = {}
+
+        raw_content = read_document(self.document_path)
         self.filename = self.document_path.name
 
         print(f"Loaded: {self.filename}")
@@ -147,57 +231,50 @@ class QuestionGenerator:
         print(f"   Provider: {self.provider_name.upper()}")
         
         self.document_content = raw_content
+        # Identical across retries so providers can serve it from their prompt cache
+        self.document_prompt = build_document_prompt(raw_content, self.filename)
+        # Cache keys use this digest so each attempt hashes only its short prompt
+        self._document_digest = make_cache_key(self.document_prompt)
 
 
     def generate_questions(
         self, num_questions: int = DEFAULT_NUM_QUESTIONS
     ) -> List[QAPair]:
         target = num_questions
-        attempt = 0
         valid_pairs: List[QAPair] = []
-        consecutive_failures = 0
 
         print(f"\nTarget questions: {target}")
 
-        while len(valid_pairs) < target and attempt <= MAX_RETRY:
-            attempt += 1
-            print(f"\nLLM attempt {attempt}")
+        # Set only on a semantic cache miss, so this document's questions get stored
+        document_vector = None
+        if self.semantic_cache:
+            document_vector = self._reuse_similar_document(target, valid_pairs)
 
+        if len(valid_pairs) < target:
             remaining = target - len(valid_pairs)
-            
-            if attempt == 1:
-                buffer_multiplier = 1.3
-            elif consecutive_failures > 0:
-                buffer_multiplier = 1.0
-                print(f"   ⚠️  Previous attempt failed, reducing request size")
-            else:
-                buffer_multiplier = 1.5
-            
-            ask_for = max(1, int(remaining * buffer_multiplier))
-            
+            print(f"\nLLM attempt 1")
+            ask_for = max(1, int(remaining * 1.3))
             print(f"   Requesting: {ask_for} questions (need {remaining} more)")
-
-            prompt = self._build_prompt(ask_for)
-            messages = self._build_messages(prompt)
-            response_text = self.provider.chat(
-                messages,
-                max_tokens=MAX_TOKENS,
-                temperature=TEMPERATURE,
+            messages, cache_key = self._prepare_request(ask_for)
+            cached = self._cached_response(cache_key)
+            reply = (cached, None) if cached is not None else self._chat(messages)
+            first_failed = (
+                self._collect_attempt(reply, cache_key, target, valid_pairs) == 0
             )
 
-            generated = self._parse_questions(response_text)
-            print(f"   Raw generated: {len(generated)}")
-            
-            if len(generated) == 0:
-                consecutive_failures += 1
-            else:
-                consecutive_failures = 0
-
-            self._extend_valid_pairs(generated, target, valid_pairs)
-            print(f"   Valid so far: {len(valid_pairs)}")
-
-            if len(valid_pairs) >= target:
-                break
+            if len(valid_pairs) < target and MAX_RETRY > 0:
+                self._run_parallel_retries(target, valid_pairs, first_failed)
+
+        if document_vector is not None and valid_pairs:
+            items = [
+                {"question": pair.question, "answer_location": pair.chunk}
+                for pair in valid_pairs
+            ]
+            self.semantic_cache.add(
+                self._semantic_text(),
+                document_vector,
+                json_utils.dumps(items).decode("utf-8"),
+            )
 
         if len(valid_pairs) < target:
             print(f"\n⚠️  Only generated {len(valid_pairs)}/{target} valid questions")
@@ -210,21 +287,152 @@ class QuestionGenerator:
 
         return valid_pairs
 
+    def _semantic_text(self) -> str:
+        return self.document_content[:DOCUMENT_EMBEDDING_CHARS]
+
+    def _reuse_similar_document(
+        self, target: int, valid_pairs: List[QAPair]
+    ) -> Optional[Any]:
+        """Seed valid_pairs from a near-duplicate document's questions.
+
+        Reused questions go through the same verbatim chunk check as fresh
+        ones, so only those whose answers also occur in this document are
+        kept. Returns the document embedding on a miss, None on a hit.
+        """
+        text = self._semantic_text()
+        vector = self.semantic_cache.embed(text)
+        cached = self.semantic_cache.get(text, vector)
+        if cached is None:
+            return vector
+
+        items = json_utils.loads(cached)
+        print(f"\n💾 Similar document in semantic cache, re-checking {len(items)} questions")
+        self._extend_valid_pairs(items, target, valid_pairs)
+        print(f"   Valid so far: {len(valid_pairs)}")
+        return None
+
+    def _run_parallel_retries(
+        self, target: int, valid_pairs: List[QAPair], first_failed: bool
+    ) -> None:
+        """Send all MAX_RETRY retries at once and merge them as they complete.
+
+        Each retry waits on the network rather than on the previous one, so
+        issuing them together costs about one round-trip instead of one per
+        retry; retries that are still running once the target is met are
+        abandoned.
+        """
+        print(f"\nLLM attempts 2-{MAX_RETRY + 1} in parallel")
+        remaining = target - len(valid_pairs)
+        if first_failed:
+            buffer_multiplier = 1.0
+            print(f"   ⚠️  Previous attempt failed, reducing request size")
+        else:
+            buffer_multiplier = 1.5
+        ask_for = max(1, int(remaining * buffer_multiplier))
+
+        print(f"   Requesting: {ask_for} questions each (need {remaining} more)")
+        messages, cache_key = self._prepare_request(ask_for)
+
+        # Cache lookups happen here, before any thread starts, so at most one
+        # retry replays the cached reply and the others sample fresh ones
+        executor = ThreadPoolExecutor(max_workers=min(MAX_RETRY, MAX_PARALLEL_RETRIES))
+        futures: List["Future[Tuple[str, Optional[str]]]"] = []
+        for _ in range(MAX_RETRY):
+            cached = self._cached_response(cache_key)
+            if cached is None:
+                futures.append(executor.submit(self._chat, messages))
+            else:
+                future: "Future[Tuple[str, Optional[str]]]" = Future()
+                future.set_result((cached, None))
+                futures.append(future)
+
+        try:
+            for attempt, future in enumerate(as_completed(futures), start=2):
+                print(f"\nLLM attempt {attempt}")
+                self._collect_attempt(future.result(), cache_key, target, valid_pairs)
+                if len(valid_pairs) >= target:
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _prepare_request(self, ask_for: int) -> Tuple[List[Dict[str, str]], str]:
+        prompt = self._build_prompt(ask_for)
+        cache_key = make_cache_key(
+            self.provider_name,
+            getattr(self.provider, "model", ""),
+            TEMPERATURE,
+            MAX_TOKENS,
+            SYSTEM_MESSAGE,
+            self._document_digest,
+            prompt,
+        )
+        return self._build_messages(prompt), cache_key
+
+    def _cached_response(self, cache_key: str) -> Optional[str]:
+        # Only the first request for a key may replay the cache; a repeat of
+        # the same prompt in this run wants a fresh sample
+        repeated = cache_key in self._requested_keys
+        self._requested_keys.add(cache_key)
+        if self.cache and not repeated:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print("   💾 Using cached response")
+                return cached
+        return None
+
+    def _chat(self, messages: List[Dict[str, str]]) -> Tuple[str, Optional[str]]:
+        """Return the reply and the provider error of this call.
+
+        last_error is per thread, so it is read here, on the thread that made
+        the call, rather than later on the thread that parses the reply.
+        """
+        response_text = self.provider.chat(
+            messages,
+            max_tokens=MAX_TOKENS,
+            temperature=TEMPERATURE,
+        )
+        return response_text, self.provider.last_error
+
+    def _collect_attempt(
+        self,
+        reply: Tuple[str, Optional[str]],
+        cache_key: str,
+        target: int,
+        valid_pairs: List[QAPair],
+    ) -> int:
+        """Parse one reply into valid_pairs and return how many items it held."""
+        response_text, error = reply
+        generated = self._parse_questions(response_text, error)
+        print(f"   Raw generated: {len(generated)}")
+        # Only responses that yielded questions are worth replaying
+        if generated and self.cache:
+            self.cache.set(cache_key, response_text)
+
+        self._extend_valid_pairs(generated, target, valid_pairs)
+        print(f"   Valid so far: {len(valid_pairs)}")
+        return len(generated)
+
     def _build_prompt(self, remaining: int) -> str:
-        return build_user_prompt(self.document_content, self.filename, remaining)
+        return build_quantity_prompt(remaining)
 
     def _build_messages(self, prompt: str) -> List[Dict[str, str]]:
-        if self.provider_name == "anthropic":
-            return [{"role": "user", "content": prompt}]
-
+        # The instructions and document lead as system messages and only the
+        # short quantity prompt varies, so retries share them as a cacheable
+        # prefix (Anthropic joins system text under cache_control; OpenAI
+        # caches prefixes)
         return [
             {"role": "system", "content": SYSTEM_MESSAGE},
+            {"role": "system", "content": self.document_prompt},
             {"role": "user", "content": prompt},
         ]
 
-    def _parse_questions(self, response_text: str) -> List[Dict]:
+    def _parse_questions(
+        self, response_text: str, error: Optional[str] = None
+    ) -> List[Dict]:
         if not response_text:
             print("   ❌ Empty response from LLM")
+            if error:
+                print(f"   ❌ Provider error: {error}")
             return []
         
         questions = parse_json_list(response_text)
@@ -236,8 +444,8 @@ class QuestionGenerator:
         print(f"   ⚠️  No valid JSON found in response")
         print(f"   📝 Response preview: {preview}...")
         
-        if self.provider.last_error:
-            print(f"   ❌ Provider error: {self.provider.last_error}")
+        if error:
+            print(f"   ❌ Provider error: {error}")
 
         return []
 
@@ -250,7 +458,8 @@ class QuestionGenerator:
             'chunk_not_found': 0,
             'duplicate': 0
         }
-        
+        seen_questions = {pair.question for pair in valid_pairs}
+
         for item in generated:
             if len(valid_pairs) >= target:
                 break
@@ -261,21 +470,26 @@ class QuestionGenerator:
                 rejected_reasons['no_answer_location'] += 1
                 continue
 
-            chunk = extract_chunk_verbatim(self.document_content, answer_text)
+            chunk = self._chunk_matches.get(answer_text)
+            if chunk is None:
+                chunk = extract_chunk_verbatim(self.document_content, answer_text)
+                self._chunk_matches[answer_text] = chunk
             if not chunk:
                 rejected_count += 1
                 rejected_reasons['chunk_not_found'] += 1
                 print(f"   ⚠️  Rejected (chunk not found): {item.get('question', '')[:60]}...")
                 continue
 
-            if any(q.question == item.get("question") for q in valid_pairs):
+            if item.get("question") in seen_questions:
                 rejected_count += 1
                 rejected_reasons['duplicate'] += 1
                 continue
 
+            question = item.get("question", "")
+            seen_questions.add(question)
             valid_pairs.append(
                 QAPair(
-                    question=item.get("question", ""),
+                    question=question,
                     file=self.filename,
                     chunk=chunk,
                 )
@@ -307,45 +521,20 @@ class QuestionGenerator:
 def classify_question_type(question: str) -> str:
     q = question.lower().strip()
 
-    if any(w in q for w in ["ai ", "ai là ", "ai chịu", "ai có trách nhiệm"]):
-        return "who"
-
-    if any(w in q for w in ["ở đâu", "tại đâu", "thuộc đâu", "áp dụng ở"]):
-        return "where"
-
-    if any(
-        w in q
-        for w in ["khi nào", "thời gian", "thời điểm", "lúc nào", "deadline"]
-    ):
-        return "when"
-
-    if any(w in q for w in ["tại sao", "vì sao", "lý do"]):
-        return "why"
-
-    if any(w in q for w in ["như thế nào", "làm thế nào", "làm sao", "cách"]):
-        return "how"
-
-    if any(
-        w in q
-        for w in ["điều kiện", "trường hợp", "khi nào thì", "nếu", "ngoại lệ"]
-    ):
-        return "condition"
-
-    if any(
-        w in q
-        for w in ["gồm những", "bao gồm", "liệt kê", "các bước", "những gì"]
-    ):
-        return "list"
-
-    if any(w in q for w in ["là gì", "gì", "nội dung"]):
-        return "what"
+    best_rank, best_type = len(QUESTION_TYPE_KEYWORDS), "unknown"
+    for match in QUESTION_KEYWORD_PATTERN.finditer(q):
+        rank, q_type = QUESTION_KEYWORD_RANKS[match.group(1)]
+        if rank < best_rank:
+            best_rank, best_type = rank, q_type
+            if rank == 0:
+                break
 
-    return "unknown"
+    return best_type
 
 
 def normalize_text(text: str) -> str:
     """Normalize text for fuzzy matching."""
-    text = re.sub(r'\s+', ' ', text)
+    text = WHITESPACE_PATTERN.sub(' ', text)
     text = text.strip()
     return text
 
@@ -359,11 +548,8 @@ def extract_chunk_verbatim(document_text: str, answer_text: str) -> str:
     if not answer_text:
         return ""
 
-    start = document_text.find(answer_text)
-    if start == -1:
-        return ""
-
-    return document_text[start : start + len(answer_text)]
+    # A verbatim match is answer_text itself; no need to locate and slice it
+    return answer_text if answer_text in document_text else ""
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
@@ -428,6 +614,28 @@ Examples:
         "--model",
         help="Model name to use (Overrides default for provider)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Always call the LLM instead of reusing responses cached in {DEFAULT_CACHE_PATH}",
+    )
+    parser.add_argument(
+        "--semantic-cache",
+        action="store_true",
+        help=(
+            "Reuse questions generated for a near-duplicate document "
+            "(requires sentence-transformers)"
+        ),
+    )
+    parser.add_argument(
+        "--cache-threshold",
+        type=float,
+        default=DEFAULT_MIN_SIMILARITY,
+        help=(
+            "Minimum cosine similarity for a --semantic-cache hit "
+            f"(default: {DEFAULT_MIN_SIMILARITY})"
+        ),
+    )
     return parser
 
 
@@ -461,16 +669,11 @@ def load_env_file(env_path: str = ENV_FILE) -> None:
     if not path.exists():
         return
 
-    for raw_line in path.read_text(encoding="utf-8").splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#") or "=" not in line:
-            continue
-
-        key, value = line.split("=", 1)
-        key = key.strip()
-        value = value.strip().strip('"').strip("'")
-        if key and key not in os.environ:
-            os.environ[key] = value
+    # Blank and comment lines simply never match
+    for match in ENV_LINE_PATTERN.finditer(path.read_text(encoding="utf-8")):
+        key = match.group(1)
+        value = match.group(2) or match.group(3) or match.group(4) or ""
+        os.environ.setdefault(key, value)
 
 
 # ============================
@@ -503,14 +706,12 @@ def load_processed() -> Dict[str, int]:
     if not Path(PROCESSED_TRACKER).exists():
         return {}
     try:
-        return json.loads(Path(PROCESSED_TRACKER).read_text(encoding="utf-8"))
+        return json_utils.loads(Path(PROCESSED_TRACKER).read_bytes())
     except:
         return {}
 
 def save_processed(processed: Dict[str, int]):
-    Path(PROCESSED_TRACKER).write_text(
-        json.dumps(processed, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    Path(PROCESSED_TRACKER).write_bytes(json_utils.dumps(processed, indent=True))
 
 
 # ============================
@@ -570,7 +771,7 @@ def main() -> None:
     all_questions: List[Dict] = []
     if Path(args.output).exists():
         try:
-            all_questions = json.loads(Path(args.output).read_text(encoding="utf-8"))
+            all_questions = json_utils.loads(Path(args.output).read_bytes())
             print(f"📌 Loaded {len(all_questions)} existing questions from {args.output}")
         except:
             all_questions = []
@@ -579,44 +780,76 @@ def main() -> None:
     skipped = 0
     total_new = 0
 
-    for idx, file_path in enumerate(input_files):
-        file_name = Path(file_path).name
-        print(f"\n{'=' * 50}")
-        print(f"📄 [{idx + 1}/{len(input_files)}] {file_name}")
-        print(f"{'=' * 50}")
-
-        # Skip nếu đã process
-        if file_name in processed:
-            print(f"   ⏭️  Already processed ({processed[file_name]} questions). Skipping.")
-            skipped += 1
-            continue
-
-        # Generate questions cho file này
-        generator = QuestionGenerator(
-            file_path,
-            provider=provider,
-            provider_name=provider_name,
+    semantic_cache: Optional[SemanticCache] = None
+    if args.semantic_cache:
+        try:
+            semantic_cache = SemanticCache(
+                model_name=DOCUMENT_EMBEDDING_MODEL,
+                min_similarity=args.cache_threshold,
+                path=None if args.no_cache else DEFAULT_CACHE_PATH,
+                # Only reuse questions produced under the same model and prompts
+                namespace=make_cache_key(
+                    provider_name,
+                    getattr(provider, "model", ""),
+                    TEMPERATURE,
+                    SYSTEM_MESSAGE,
+                    USER_PROMPT_TEMPLATE,
+                ),
+            )
+        except ValueError as exc:
+            print(f"❌ {exc}")
+            return
+        print(
+            f"🧠 Semantic cache: similarity >= {semantic_cache.min_similarity} "
+            f"({semantic_cache.size()} entries)"
         )
 
-        qa_pairs = generator.generate_questions(args.num_questions)
-        if not qa_pairs:
-            print(f"   ❌ No questions generated for {file_name}")
-            continue
+    cache = None if args.no_cache else ResponseCache()
+    try:
+        for idx, file_path in enumerate(input_files):
+            file_name = Path(file_path).name
+            print(f"\n{'=' * 50}")
+            print(f"📄 [{idx + 1}/{len(input_files)}] {file_name}")
+            print(f"{'=' * 50}")
+
+            # Skip nếu đã process
+            if file_name in processed:
+                print(f"   ⏭️  Already processed ({processed[file_name]} questions). Skipping.")
+                skipped += 1
+                continue
+
+            # Generate questions cho file này
+            generator = QuestionGenerator(
+                file_path,
+                provider=provider,
+                provider_name=provider_name,
+                cache=cache,
+                semantic_cache=semantic_cache,
+            )
+
+            qa_pairs = generator.generate_questions(args.num_questions)
+            if not qa_pairs:
+                print(f"   ❌ No questions generated for {file_name}")
+                continue
 
-        generator._print_statistics(qa_pairs)
+            generator._print_statistics(qa_pairs)
 
-        new_questions = [asdict(pair) for pair in qa_pairs]
-        all_questions.extend(new_questions)
-        total_new += len(new_questions)
+            new_questions = [pair.to_dict() for pair in qa_pairs]
+            all_questions.extend(new_questions)
+            total_new += len(new_questions)
 
-        # Mark processed + save output incremental sau mỗi file
-        processed[file_name] = len(new_questions)
-        save_processed(processed)
+            # Mark processed + save output incremental sau mỗi file
+            processed[file_name] = len(new_questions)
+            save_processed(processed)
 
-        with open(args.output, "w", encoding="utf-8") as f:
-            json.dump(all_questions, f, ensure_ascii=False, indent=2)
+            json_utils.dump_list(Path(args.output), all_questions)
 
-        print(f"   ✅ +{len(new_questions)} questions. Total: {len(all_questions)}")
+            print(f"   ✅ +{len(new_questions)} questions. Total: {len(all_questions)}")
+    finally:
+        if cache:
+            cache.close()
+        if semantic_cache:
+            semantic_cache.close()
 
     # ── Preview nếu cần ──
     if args.preview and not preview_dataset(all_questions):
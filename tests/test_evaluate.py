@@ -0,0 +1,263 @@
+"""
+Tests for batching, caching and checkpoints in evaluate.py.
+
+Run from the repository root: python -m unittest discover -s tests
+"""
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest import mock
+
+import evaluate
+from providers.base import LLMProvider
+from providers.cache import ResponseCache
+
+
+class FakeProvider(LLMProvider):
+    """Answers batch prompts with one verdict per item, single prompts with one verdict."""
+
+    model = "fake"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.prompts: List[str] = []
+
+    def chat(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        numbers = sorted({int(n) for n in re.findall(r"^Item (\d+):", prompt, re.M)})
+        verdict = {"label": "ENTAILED", "score": 8, "confidence": 0.9, "reason": "ok"}
+        if numbers:
+            return json.dumps({"results": [dict(verdict, item=n) for n in numbers]})
+        return json.dumps(verdict)
+
+
+class ScriptedProvider(LLMProvider):
+    """Returns the same reply to every request and counts the calls."""
+
+    model = "scripted"
+
+    def __init__(self, reply: str) -> None:
+        super().__init__()
+        self.reply = reply
+        self.calls = 0
+
+    def chat(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
+        self.calls += 1
+        return self.reply
+
+
+def make_groups(count: int, chunk_chars: int) -> List[List[tuple]]:
+    return [
+        [(idx, {"question": f"q{idx}", "chunk": "c" * chunk_chars, "answer": "a"})]
+        for idx in range(count)
+    ]
+
+
+def prompt_tokens(batch: List[List[tuple]]) -> int:
+    items = [group[0][1] for group in batch]
+    return evaluate.SYSTEM_PROMPT_TOKENS[evaluate.DEFAULT_PROMPT_VERSION] + (
+        evaluate.estimate_tokens(evaluate.build_batch_user_prompt(items))
+    )
+
+
+class BatchesWithinLimitTest(unittest.TestCase):
+    def test_large_items_are_split_below_the_token_limit(self) -> None:
+        groups = make_groups(25, 4000)
+        batches = list(evaluate.batches_within_limit(groups, 25))
+
+        self.assertGreater(len(batches), 1)
+        self.assertEqual([g for batch in batches for g in batch], groups)
+        for batch in batches:
+            self.assertLessEqual(prompt_tokens(batch), evaluate.MAX_INPUT_TOKENS)
+
+    def test_small_items_fill_batches_up_to_size(self) -> None:
+        groups = make_groups(7, 10)
+        batches = list(evaluate.batches_within_limit(groups, 3))
+
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+
+
+class ProcessBatchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.config = evaluate.EvaluatorConfig(
+            input_path="",
+            output_path="",
+            provider="deepseek",
+            temperature=0.0,
+            sleep_time=0,
+            concurrency=1,
+            ollama_model="",
+            ollama_url="",
+            use_cache=False,
+            batch_size=25,
+        )
+
+    def test_over_limit_batch_falls_back_to_single_items(self) -> None:
+        batch = [group[0] for group in make_groups(25, 4000)]
+        self.assertGreater(
+            prompt_tokens([[pair] for pair in batch]), evaluate.MAX_INPUT_TOKENS
+        )
+
+        provider = FakeProvider()
+        evaluate.process_batch(
+            provider, "deepseek", self.config, batch, evaluate.RequestPacer(0)
+        )
+
+        self.assertEqual(len(provider.prompts), 25)
+        self.assertEqual({item["evaluate"] for _, item in batch}, {"correct"})
+
+    def test_reply_without_results_falls_back_to_single_items(self) -> None:
+        batch = [group[0] for group in make_groups(3, 10)]
+        # A bare verdict instead of {"results": [...]}, valid as a single reply
+        provider = ScriptedProvider(
+            '{"label": "ENTAILED", "score": 8, "confidence": 0.9, "reason": "ok"}'
+        )
+
+        with mock.patch.object(evaluate, "retry_delay", return_value=0.0):
+            evaluate.process_batch(
+                provider, "deepseek", self.config, batch, evaluate.RequestPacer(0)
+            )
+
+        self.assertEqual(provider.calls, evaluate.BATCH_ATTEMPTS + 3)
+        self.assertEqual({item["evaluate"] for _, item in batch}, {"correct"})
+
+
+class RequestCompletionCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        fd, self.cache_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.cache = ResponseCache(self.cache_path)
+        self.item = {"question": "q", "chunk": "c", "answer": "a"}
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        os.remove(self.cache_path)
+
+    def call(self, provider: LLMProvider) -> evaluate.NliResult:
+        return evaluate.call_llm(provider, "deepseek", self.item, 0.0, self.cache)
+
+    def test_reply_failing_validation_is_not_cached(self) -> None:
+        provider = ScriptedProvider('{"score": "high"}')
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.call(provider)
+
+        self.assertEqual(provider.calls, 2)
+
+    def test_valid_reply_is_served_from_cache(self) -> None:
+        provider = ScriptedProvider(
+            '{"label": "ENTAILED", "score": 8, "confidence": 0.9, "reason": "ok"}'
+        )
+
+        first = self.call(provider)
+        second = self.call(provider)
+
+        self.assertEqual(first, second)
+        self.assertEqual(provider.calls, 1)
+
+    def test_cached_reply_failing_validation_is_ignored(self) -> None:
+        self.call(
+            ScriptedProvider(
+                '{"label": "ENTAILED", "score": 8, "confidence": 0.9, "reason": "ok"}'
+            )
+        )
+        # Overwrite the entry with a reply written by an older, unvalidated run
+        with sqlite3.connect(self.cache_path) as conn:
+            conn.execute("UPDATE responses SET response = ?", ('{"score": "high"}',))
+        provider = ScriptedProvider(
+            '{"label": "CONTRADICTED", "score": 2, "confidence": 0.9, "reason": "no"}'
+        )
+
+        self.assertEqual(self.call(provider).score, 2)
+        self.assertEqual(provider.calls, 1)
+
+
+class LoadCheckpointTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / "data_semantic_scored.jsonl"
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def write(self, *entries: Dict[str, Any]) -> None:
+        self.path.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+
+    def test_entries_from_another_configuration_are_ignored(self) -> None:
+        item = {"question": "q", "chunk": "c", "answer": "a", "evaluate": "ENTAILED"}
+        self.write(
+            {**item, "score": 8, "checkpoint_namespace": "run-a"},
+            {**item, "question": "q2", "score": 3, "checkpoint_namespace": "run-b"},
+            {**item, "question": "q3", "score": 5},
+        )
+
+        scored = evaluate.load_checkpoint(self.path, "run-a")
+
+        self.assertEqual(list(scored.values()), [{**item, "score": 8}])
+
+
+    def test_partial_last_line_is_truncated(self) -> None:
+        entry = {"question": "q", "chunk": "c", "answer": "a", "evaluate": "ENTAILED"}
+        self.write({**entry, "checkpoint_namespace": "run-a"})
+        complete = self.path.read_bytes()
+        with self.path.open("ab") as checkpoint_file:
+            checkpoint_file.write(b'{"question": "q2", "chu')
+
+        scored = evaluate.load_checkpoint(self.path, "run-a")
+
+        self.assertEqual(list(scored.values()), [entry])
+        self.assertEqual(self.path.read_bytes(), complete)
+
+
+class FailingProvider(LLMProvider):
+    """Returns no reply and reports the given provider error."""
+
+    model = "failing"
+
+    def __init__(self, error: str) -> None:
+        super().__init__()
+        self.error = error
+
+    def chat(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
+        self.last_error = self.error
+        return ""
+
+
+class ProviderErrorTest(unittest.TestCase):
+    def call(self, error: str) -> None:
+        item = {"question": "q", "chunk": "c", "answer": "a"}
+        evaluate.call_llm(FailingProvider(error), "deepseek", item, 0.0)
+
+    def test_client_errors_are_fatal(self) -> None:
+        for error in (
+            "400 Client Error: Bad Request for url: http://localhost/v1/chat",
+            "Error code: 404 - {'error': 'model not found'}",
+            "Error code: 401 - invalid api key",
+            "missing_openai_library",
+        ):
+            with self.subTest(error=error):
+                with self.assertRaises(ValueError) as ctx:
+                    self.call(error)
+                self.assertNotIsInstance(ctx.exception, evaluate.RetryableError)
+
+    def test_timeouts_rate_limits_and_server_errors_are_retryable(self) -> None:
+        for error in (
+            "408 Client Error: Request Timeout for url: http://localhost/v1/chat",
+            "Error code: 429 - rate limited",
+            "503 Server Error: Service Unavailable",
+            "Read timed out. (read timeout=60)",
+        ):
+            with self.subTest(error=error):
+                with self.assertRaises(evaluate.RetryableError):
+                    self.call(error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+"""
+Tests for response parsing in script.py.
+
+Run from the repository root: python -m unittest discover -s tests
+"""
+import unittest
+
+import script
+
+
+class ParseJsonListTest(unittest.TestCase):
+    def test_skips_bracket_in_prose_before_the_list(self) -> None:
+        reply = 'Tôi sẽ tạo [2] câu hỏi:\n[{"question": "Ai phê duyệt?", "answer_location": "x"}]'
+
+        self.assertEqual(
+            script.parse_json_list(reply),
+            [{"question": "Ai phê duyệt?", "answer_location": "x"}],
+        )
+
+    def test_ignores_text_after_the_list(self) -> None:
+        reply = '```json\n[{"question": "q"}]\n```\nXem thêm [1]'
+
+        self.assertEqual(script.parse_json_list(reply), [{"question": "q"}])
+
+    def test_rejects_lists_that_are_not_objects(self) -> None:
+        self.assertEqual(script.parse_json_list("Kết quả: [1, 2, 3]"), [])
+
+    def test_repairs_invalid_escapes(self) -> None:
+        reply = r'[{"question": "C:\\path \x"}]'
+
+        self.assertEqual(script.parse_json_list(reply), [{"question": "C:\\path \\x"}])
+
+
+if __name__ == "__main__":
+    unittest.main()